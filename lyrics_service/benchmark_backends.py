@@ -0,0 +1,89 @@
+# benchmark_backends.py
+"""
+Startup time and peak RSS of the csv vs sqlite lyrics backends.
+
+    python benchmark_backends.py [rows]      # default 200k rows, ~1.5 KB lyrics each
+
+Each backend is measured in a fresh subprocess so RSS numbers don't mix
+(peak RSS is read from /proc, so Linux only).
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.getcwd())
+
+LYRICS = " ".join(["and i will always love you"] * 55)
+
+
+def make_catalog(csv_path: str, rows: int) -> None:
+    import pandas as pd
+
+    pd.DataFrame(
+        {
+            "artist_name": [f"artist {i % 5000}" for i in range(rows)],
+            "track_name": [f"track {i}" for i in range(rows)],
+            "lyrics": [f"{LYRICS} {i}" for i in range(rows)],
+        }
+    ).to_csv(csv_path, index=False)
+
+
+def peak_rss_mb() -> float:
+    # VmHWM сбрасывается при exec, в отличие от ru_maxrss
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def measure(backend: str, csv_path: str, sqlite_path: str) -> None:
+    # запускается в дочернем процессе
+    import pandas  # noqa: F401  — импорт не должен попадать в startup
+
+    from src.repo_factory import create_lyrics_repository
+
+    base_rss = peak_rss_mb()
+    t0 = time.perf_counter()
+    repo = create_lyrics_repository(backend, csv_path, sqlite_path)
+    startup = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for i in range(0, 1000):
+        assert repo.find_lyrics(f"artist {i % 5000}", f"track {i}")
+    lookup_us = (time.perf_counter() - t0) / 1000 * 1e6
+
+    rss = peak_rss_mb()
+    print(
+        f"{backend:>6} | startup {startup:7.2f}s | lookup {lookup_us:8.1f} us | "
+        f"peak RSS {rss:7.1f} MB (+{rss - base_rss:.1f} MB over imports)"
+    )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 5 and sys.argv[1] == "--measure":
+        measure(*sys.argv[2:])
+        sys.exit(0)
+
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "songs.csv")
+        sqlite_path = os.path.join(tmp, "songs.sqlite3")
+
+        make_catalog(csv_path, rows)
+        print(f"catalog: {rows} rows, {os.path.getsize(csv_path) / 2**20:.1f} MB csv")
+
+        from src.repo_sqlite import convert_csv_to_sqlite
+
+        t0 = time.perf_counter()
+        convert_csv_to_sqlite(csv_path, sqlite_path)
+        print(f"one-shot conversion: {time.perf_counter() - t0:.2f}s")
+
+        for backend in ("csv", "sqlite"):
+            subprocess.run(
+                [sys.executable, __file__, "--measure", backend, csv_path, sqlite_path],
+                check=True,
+            )
@@ -0,0 +1,125 @@
+# benchmark_condenser.py
+"""
+Prompt size (and, with GROQ_API_KEY set, Groq latency) before/after lyric condensation.
+
+    python benchmark_condenser.py [csv_path] [requests]   # default: synthetic Genius-style set
+
+Old behaviour = blank lines stripped, every song cut at 1800 chars.
+New behaviour = lyrics_condenser.fit_to_budget with GROQ_LYRICS_TOKEN_BUDGET.
+"""
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.getcwd())
+
+from config import Settings
+from src.llm_groq import GroqAPIInteractor
+from src.lyrics_condenser import CHARS_PER_TOKEN
+
+SONGS_PER_REQUEST = 10
+
+
+class LegacyInteractor(GroqAPIInteractor):
+    def _condense_lyrics(self, texts, token_budget):
+        out = []
+        for text in texts:
+            t = (text or "").replace("\r", "\n")
+            t = "\n".join([ln.strip() for ln in t.splitlines() if ln.strip()])
+            out.append(t[:1800])
+        return out
+
+
+def synthetic_song(i: int) -> dict:
+    # так выглядят тексты с Genius: заголовки секций и припев после каждого куплета
+    rnd = random.Random(i)
+    words = "night heart fire rain city road light dream cold home lost run".split()
+
+    def line():
+        return " ".join(
+            rnd.choice(words) for _ in range(rnd.randint(5, 9))
+        ).capitalize()
+
+    chorus = [line() for _ in range(4)]
+    parts = [f"Song {i} Lyrics"]
+    for v in range(3):
+        parts += [f"[Verse {v + 1}]"] + [line() for _ in range(8)]
+        parts += ["", "[Chorus]"] + chorus + [""]
+    parts += ["[Outro]"] + chorus[:2] * 2 + ["42Embed"]
+    return {"artist": f"artist {i}", "song": f"song {i}", "lyrics": "\n".join(parts)}
+
+
+def load_songs(csv_path: str, count: int) -> list:
+    import pandas as pd
+
+    df = pd.read_csv(csv_path, usecols=["artist_name", "track_name", "lyrics"])
+    df = df.dropna().sample(n=count, replace=len(df) < count, random_state=0)
+    return [
+        {"artist": r.artist_name, "song": r.track_name, "lyrics": r.lyrics}
+        for r in df.itertuples()
+    ]
+
+
+def user_prompt_chars(interactor: GroqAPIInteractor, songs: list) -> int:
+    return len(interactor._build_payload(songs)["messages"][1]["content"])
+
+
+def groq_latency(interactor: GroqAPIInteractor, batches: list) -> float:
+    timings = []
+    for songs in batches:
+        t0 = time.perf_counter()
+        interactor.analyze_songs_with_llm(songs)
+        timings.append(time.perf_counter() - t0)
+    return statistics.median(timings)
+
+
+if __name__ == "__main__":
+    # Genius и RabbitMQ тут не нужны — без validate()
+    settings = Settings()
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else ""
+    n_requests = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    total = n_requests * SONGS_PER_REQUEST
+    songs = (
+        load_songs(csv_path, total)
+        if csv_path
+        else [synthetic_song(i) for i in range(total)]
+    )
+    batches = [
+        songs[i : i + SONGS_PER_REQUEST] for i in range(0, total, SONGS_PER_REQUEST)
+    ]
+
+    key, model = settings.GROQ_API_KEY or "", settings.GROQ_MODEL
+    variants = {
+        "legacy": LegacyInteractor(key, model, settings.GROQ_BASE_URL),
+        "condensed": GroqAPIInteractor(
+            key,
+            model,
+            settings.GROQ_BASE_URL,
+            lyrics_token_budget=settings.GROQ_LYRICS_TOKEN_BUDGET,
+        ),
+    }
+
+    print(
+        f"{n_requests} requests x {SONGS_PER_REQUEST} songs, "
+        f"budget {settings.GROQ_LYRICS_TOKEN_BUDGET} tokens"
+    )
+    sizes = {}
+    for name, interactor in variants.items():
+        sizes[name] = statistics.mean(user_prompt_chars(interactor, b) for b in batches)
+        print(
+            f"{name:>9} | user prompt {sizes[name]:8.0f} chars "
+            f"(~{sizes[name] / CHARS_PER_TOKEN:6.0f} tokens)"
+        )
+    print(f"reduction: {1 - sizes['condensed'] / sizes['legacy']:.1%}")
+
+    if not key:
+        print("GROQ_API_KEY is not set, skipping latency")
+        sys.exit(0)
+
+    # кэш разборов не подключён — каждый вызов реально уходит в Groq
+    for name, interactor in variants.items():
+        latency = groq_latency(interactor, batches)
+        print(f"{name:>9} | median Groq latency {latency * 1000:7.0f} ms")
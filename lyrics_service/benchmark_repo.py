@@ -0,0 +1,65 @@
+# benchmark_repo.py
+"""
+Lookup cost of CsvLyricsRepository vs. catalog size.
+
+    python benchmark_repo.py                 # 1k, 10k, 100k, 1M rows
+    python benchmark_repo.py 5000 50000      # custom sizes
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.getcwd())
+
+import pandas as pd
+
+from src.repo_csv import CsvLyricsRepository
+
+LOOKUPS = 2000
+
+
+def make_catalog(path: str, rows: int) -> None:
+    pd.DataFrame(
+        {
+            "artist_name": [f"artist {i % 5000}" for i in range(rows)],
+            "track_name": [f"track {i}" for i in range(rows)],
+            "lyrics": [f"la la la {i}" for i in range(rows)],
+        }
+    ).to_csv(path, index=False)
+
+
+def bench(rows: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "songs.csv")
+        make_catalog(path, rows)
+
+        t0 = time.perf_counter()
+        repo = CsvLyricsRepository(path)
+        load_s = time.perf_counter() - t0
+
+        rnd = random.Random(42)
+        hits = [rnd.randrange(rows) for _ in range(LOOKUPS)]
+
+        t0 = time.perf_counter()
+        for i in hits:
+            # регистр отличается от CSV — проверяем нормализацию ключа
+            assert repo.find_lyrics(f"Artist {i % 5000}", f"TRACK {i}")
+        hit_us = (time.perf_counter() - t0) / LOOKUPS * 1e6
+
+        t0 = time.perf_counter()
+        for i in hits:
+            assert repo.find_lyrics("nobody", f"missing {i}") is None
+        miss_us = (time.perf_counter() - t0) / LOOKUPS * 1e6
+
+    print(
+        f"{rows:>10} rows | load {load_s:7.2f}s | "
+        f"hit {hit_us:7.2f} us/lookup | miss {miss_us:7.2f} us/lookup"
+    )
+
+
+if __name__ == "__main__":
+    sizes = [int(x) for x in sys.argv[1:]] or [1_000, 10_000, 100_000, 1_000_000]
+    for n in sizes:
+        bench(n)
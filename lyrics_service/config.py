@@ -11,16 +11,69 @@ class Settings(BaseSettings):
     GROQ_BASE_URL: str = os.getenv(
         "GROQ_BASE_URL", "https://api.groq.com/openai/v1"
     ).strip()
+    GROQ_TIMEOUT: float = float(os.getenv("GROQ_TIMEOUT", 30))
+    GROQ_MAX_CONNECTIONS: int = int(os.getenv("GROQ_MAX_CONNECTIONS", 10))
+    # окно склейки песен из разных сообщений в один вызов Groq (0 — выключено)
+    GROQ_BATCH_WINDOW_MS: float = float(os.getenv("GROQ_BATCH_WINDOW_MS", 0))
+    GROQ_BATCH_MAX_SONGS: int = int(os.getenv("GROQ_BATCH_MAX_SONGS", 30))
+    # бюджет токенов на тексты песен одного запроса (~4 символа на токен)
+    GROQ_LYRICS_TOKEN_BUDGET: int = int(os.getenv("GROQ_LYRICS_TOKEN_BUDGET", 2500))
+
+    # кэш summary/keywords по песням; пустой путь — кэш выключен
+    ANALYSIS_CACHE_PATH: str = os.getenv(
+        "ANALYSIS_CACHE_PATH", "./data/analysis_cache.sqlite3"
+    )
+    ANALYSIS_CACHE_MAX_ENTRIES: int = int(
+        os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", 50_000)
+    )
+
+    # каталог search_service проверяется до Genius; пустой URL — не проверять
+    OPENSEARCH_SERVICE_URL: str = os.getenv(
+        "OPENSEARCH_SERVICE_URL", "http://opensearch_service:8009"
+    )
+    CATALOG_LOOKUP_TIMEOUT: float = float(os.getenv("CATALOG_LOOKUP_TIMEOUT", 1.0))
+    GENIUS_LOOKUP_TIMEOUT: float = float(os.getenv("GENIUS_LOOKUP_TIMEOUT", 20.0))
+
+    # сколько запросов к Genius идёт одновременно (lyricsgenius синхронный)
+    GENIUS_WORKERS: int = int(os.getenv("GENIUS_WORKERS", 4))
+    # лимиты провайдеров, запросов в секунду (0 — без токен-бакета); параллельность
+    # подстраивается сама: растёт на успехах, падает вдвое на 429 и таймаутах
+    GENIUS_RATE_LIMIT: float = float(os.getenv("GENIUS_RATE_LIMIT", 0))
+    GROQ_RATE_LIMIT: float = float(os.getenv("GROQ_RATE_LIMIT", 0))
+    # предохранители Genius/Groq/каталога: столько ошибок подряд -> открыт,
+    # через столько секунд — пробный запрос
+    BREAKER_FAILURE_THRESHOLD: int = int(os.getenv("BREAKER_FAILURE_THRESHOLD", 5))
+    BREAKER_RECOVERY_TIMEOUT: float = float(os.getenv("BREAKER_RECOVERY_TIMEOUT", 30))
+    # фоновая подгрузка top-N песен исполнителя после промаха (0 — выключена)
+    PREFETCH_TOP_N: int = int(os.getenv("PREFETCH_TOP_N", 0))
+    PREFETCH_QUEUE_SIZE: int = int(os.getenv("PREFETCH_QUEUE_SIZE", 100))
+    PREFETCH_ARTISTS_PER_MINUTE: float = float(
+        os.getenv("PREFETCH_ARTISTS_PER_MINUTE", 6)
+    )
+    # сколько секунд помнить "не найдено" и временные ошибки Genius (0 — не помнить)
+    GENIUS_NOT_FOUND_TTL: float = float(os.getenv("GENIUS_NOT_FOUND_TTL", 24 * 3600))
+    GENIUS_ERROR_TTL: float = float(os.getenv("GENIUS_ERROR_TTL", 300))
 
     RABBIT_HOST: str = os.getenv("RABBIT_HOST", "rabbitmq")
     RABBIT_PORT: int = int(os.getenv("RABBIT_PORT", 5432))
     RABBIT_USER: str = os.getenv("RABBIT_USER", "guest")
     RABBIT_PASS: str = os.getenv("RABBIT_PASS", "guest")
+    # сколько сообщений воркер обрабатывает одновременно и сколько берёт у брокера
+    RABBIT_MAX_CONCURRENCY: int = int(os.getenv("RABBIT_MAX_CONCURRENCY", 8))
+    RABBIT_PREFETCH_COUNT: int = int(os.getenv("RABBIT_PREFETCH_COUNT", 0))
+
+    STATS_LOG_INTERVAL: int = int(os.getenv("STATS_LOG_INTERVAL", 60))
 
     QUEUE_IN: str = os.getenv("QUEUE_REQUESTS", "requests")
     QUEUE_OUT: str = os.getenv("QUEUE_LYRICS", "lyrics")
 
     CSV_PATH: str = "./data/songs.csv"
+    # сколько upsert'ов копится в журнале до фоновой перезаписи CSV
+    CSV_COMPACT_EVERY: int = int(os.getenv("CSV_COMPACT_EVERY", 500))
+
+    # csv — весь каталог в pandas; sqlite — на диске (см. convert_csv_to_sqlite.py)
+    LYRICS_BACKEND: str = os.getenv("LYRICS_BACKEND", "csv")
+    SQLITE_PATH: str = os.getenv("SQLITE_PATH", "./data/songs.sqlite3")
 
     def validate(self) -> None:
         if self.GENIUS_API_TOKEN is None:
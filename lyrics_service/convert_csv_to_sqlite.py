@@ -0,0 +1,27 @@
+# convert_csv_to_sqlite.py
+"""
+Одноразовая конвертация ./data/songs.csv в SQLite-хранилище.
+
+    python convert_csv_to_sqlite.py [csv_path] [sqlite_path]
+"""
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.getcwd())
+
+from src.repo_sqlite import convert_csv_to_sqlite
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+if __name__ == "__main__":
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else "./data/songs.csv"
+    sqlite_path = sys.argv[2] if len(sys.argv) > 2 else "./data/songs.sqlite3"
+
+    if os.path.exists(sqlite_path):
+        print(f"{sqlite_path} already exists, remove it first to reconvert")
+        sys.exit(1)
+
+    convert_csv_to_sqlite(csv_path, sqlite_path)
@@ -0,0 +1,399 @@
+# enrich_catalog.py
+"""
+Офлайн-разбор всего каталога: summary/keywords для каждой песни заранее.
+
+    python enrich_catalog.py [--csv ./data/songs.csv] [--no-index]
+                             [--batch-size 10] [--concurrency 4]
+                             [--checkpoint ./data/enrich_checkpoint.json]
+
+Проходит по songs.csv и по индексу OpenSearch (scroll), разбирает песни пачками
+через Groq с ограниченной параллельностью и сохраняет результат:
+- в ANALYSIS_CACHE_PATH — закреплёнными записями, которые не вытесняются;
+  разбор каталожной песни во время запроса становится поиском в кэше;
+- в документы индекса — поля summary и keywords (по ним ищет search_service).
+
+Прогресс CSV пишется в checkpoint после каждой готовой пачки: прерванный запуск
+продолжается с места остановки, а уже разобранные песни повторно в LLM не идут.
+Для индекса checkpoint не нужен: scroll выбирает только документы без summary.
+OpenSearch: OPENSEARCH_URL, OPENSEARCH_INDEX, OPENSEARCH_USER,
+OPENSEARCH_INITIAL_ADMIN_PASSWORD — те же переменные, что у search_service.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+import httpx
+
+sys.path.insert(0, os.getcwd())
+
+from config import Settings
+from src.analysis_cache import AnalysisCache, is_cacheable
+from src.llm_groq import AsyncGroqAPIInteractor, is_analyzed
+from src.rate_limiter import AdaptiveRateLimiter
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+# те же поля добавлены в INDEX_BODY search_service/create_index.py
+ENRICHMENT_MAPPING = {
+    "properties": {
+        "summary": {"type": "text", "analyzer": "text_analyzer"},
+        "keywords": {"type": "keyword"},
+    }
+}
+
+
+class Checkpoint:
+    """Сколько пачек CSV уже полностью обработано."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.done: Dict[str, int] = {}
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.done = json.load(f)
+
+    def get(self, source: str) -> int:
+        return self.done.get(source, 0)
+
+    def set(self, source: str, batches: int) -> None:
+        self.done[source] = batches
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.done, f)
+        os.replace(tmp_path, self.path)
+
+
+def iter_csv_songs(csv_path: str, chunksize: int = 10_000) -> Iterator[Dict[str, Any]]:
+    import pandas as pd
+
+    for chunk in pd.read_csv(
+        csv_path, usecols=["artist_name", "track_name", "lyrics"], chunksize=chunksize
+    ):
+        for row in chunk.fillna("").itertuples(index=False):
+            yield {
+                "artist": str(row.artist_name),
+                "song": str(row.track_name),
+                "lyrics": str(row.lyrics),
+            }
+
+
+async def iter_index_songs(
+    client: httpx.AsyncClient, index: str, page_size: int = 500
+) -> AsyncIterator[Dict[str, Any]]:
+    r = await client.post(
+        f"/{index}/_search",
+        params={"scroll": "10m"},
+        json={
+            "size": page_size,
+            "sort": ["_doc"],
+            # только не разобранные: порядок _doc между запусками не сохраняется
+            # (bulk update переписывает документы в новые сегменты), поэтому
+            # продолжаем не по номеру пачки, а по отсутствию summary
+            "query": {"bool": {"must_not": {"exists": {"field": "summary"}}}},
+            "_source": ["artist_name", "track_name", "lyrics", "summary"],
+        },
+    )
+    r.raise_for_status()
+    data = r.json()
+    scroll_id = data.get("_scroll_id")
+    try:
+        while data["hits"]["hits"]:
+            for hit in data["hits"]["hits"]:
+                source = hit["_source"]
+                yield {
+                    "artist": source.get("artist_name", ""),
+                    "song": source.get("track_name", ""),
+                    "lyrics": source.get("lyrics", ""),
+                    "doc_id": hit["_id"],
+                    "enriched": bool(source.get("summary")),
+                }
+            r = await client.post(
+                "/_search/scroll", json={"scroll": "10m", "scroll_id": scroll_id}
+            )
+            r.raise_for_status()
+            data = r.json()
+            scroll_id = data.get("_scroll_id", scroll_id)
+    finally:
+        if scroll_id:
+            await client.request(
+                "DELETE", "/_search/scroll", json={"scroll_id": scroll_id}
+            )
+
+
+async def batched(songs, size: int) -> AsyncIterator[List[Dict[str, Any]]]:
+    batch = []
+    if hasattr(songs, "__aiter__"):
+        async for song in songs:
+            batch.append(song)
+            if len(batch) == size:
+                yield batch
+                batch = []
+    else:
+        for song in songs:
+            batch.append(song)
+            if len(batch) == size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+class CatalogEnricher:
+    def __init__(
+        self,
+        interactor: AsyncGroqAPIInteractor,
+        cache: AnalysisCache,
+        checkpoint: Checkpoint,
+        index_client: Optional[httpx.AsyncClient] = None,
+        index_name: str = "",
+        concurrency: int = 4,
+    ):
+        self.interactor = interactor
+        self.cache = cache
+        self.checkpoint = checkpoint
+        self.index_client = index_client
+        self.index_name = index_name
+        self.concurrency = concurrency
+
+        self.analyzed = 0
+        self.from_cache = 0
+        self.failed = 0
+        self.skipped = 0
+        self.index_updates = 0
+        self.failed_batches = 0
+
+    async def run(
+        self,
+        source: str,
+        batches: AsyncIterator[List[Dict[str, Any]]],
+        checkpointed: bool = True,
+    ):
+        """
+        Пачки идут параллельно (не больше concurrency); checkpoint сдвигается
+        только по непрерывному префиксу готовых пачек. checkpointed=False —
+        источник сам отдаёт только не разобранные песни.
+        """
+        start = self.checkpoint.get(source) if checkpointed else 0
+        semaphore = asyncio.Semaphore(self.concurrency)
+        finished = set()
+        committed = start
+        tasks = set()
+
+        async def process(number: int, batch: List[Dict[str, Any]]) -> None:
+            nonlocal committed
+            try:
+                await self._process_batch(batch)
+            except Exception as e:
+                # checkpoint на этой пачке остановится — перезапуск её повторит
+                logging.error(f"[enrich] {source} batch {number} failed: {e}")
+                self.failed_batches += 1
+            else:
+                finished.add(number)
+                while committed in finished:
+                    finished.discard(committed)
+                    committed += 1
+                if checkpointed:
+                    self.checkpoint.set(source, committed)
+            finally:
+                semaphore.release()
+
+        number = 0
+        async for batch in batches:
+            if number < start:
+                number += 1
+                continue
+            await semaphore.acquire()
+            task = asyncio.create_task(process(number, batch))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            number += 1
+            if number % 50 == 0:
+                logging.info(f"[enrich] {source}: {number} batches, {self.stats()}")
+
+        if tasks:
+            await asyncio.gather(*tasks)
+        logging.info(f"[enrich] {source} done: {number} batches, {self.stats()}")
+
+    async def _process_batch(self, batch: List[Dict[str, Any]]) -> None:
+        songs = [s for s in batch if is_cacheable(s) and not s.get("enriched")]
+        self.skipped += len(batch) - len(songs)
+
+        # кэш — SQLite с commit'ами; пачки идут параллельно, loop не блокируем
+        hits = await asyncio.to_thread(
+            self.cache.get_many, [(s["artist"], s["song"], s["lyrics"]) for s in songs]
+        )
+        results = {i: hit for i, hit in enumerate(hits) if hit}
+        pending = [i for i, hit in enumerate(hits) if not hit]
+        self.from_cache += len(results)
+
+        # разобраны во время запросов — просто закрепляем
+        await asyncio.to_thread(
+            self.cache.put_many,
+            [
+                (s["artist"], s["song"], s["lyrics"], hit["summary"], hit["keywords"])
+                for s, hit in zip(songs, hits)
+                if hit
+            ],
+        )
+
+        if pending:
+            # удачные разборы interactor кладёт в кэш сам (pin_writes=True),
+            # в индекс идёт то, что он вернул
+            analysis = await self.interactor.analyze_songs_with_llm(
+                [songs[i] for i in pending]
+            )
+            for i, song_text in zip(pending, analysis["songs_texts"]):
+                if is_analyzed(song_text):
+                    results[i] = {
+                        "summary": song_text["summary"],
+                        "keywords": song_text.get("keywords") or [],
+                    }
+                    self.analyzed += 1
+                else:
+                    self.failed += 1
+
+        if self.index_client:
+            await self._update_index(
+                [(songs[i].get("doc_id"), hit) for i, hit in results.items()]
+            )
+
+    async def _update_index(self, updates) -> None:
+        lines = []
+        for doc_id, hit in updates:
+            if not doc_id:
+                continue
+            lines.append(
+                json.dumps({"update": {"_index": self.index_name, "_id": doc_id}})
+            )
+            lines.append(
+                json.dumps(
+                    {"doc": {"summary": hit["summary"], "keywords": hit["keywords"]}},
+                    ensure_ascii=False,
+                )
+            )
+        if not lines:
+            return
+
+        r = await self.index_client.post(
+            "/_bulk",
+            content="\n".join(lines) + "\n",
+            headers={"Content-Type": "application/x-ndjson"},
+        )
+        r.raise_for_status()
+        errors = [
+            item["update"]["error"]
+            for item in r.json().get("items", [])
+            if item.get("update", {}).get("error")
+        ]
+        if errors:
+            # пачку не засчитываем — после перезапуска она пройдёт снова (из кэша)
+            raise RuntimeError(
+                f"bulk update failed for {len(errors)} docs: {errors[0]}"
+            )
+        self.index_updates += len(lines) // 2
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "analyzed": self.analyzed,
+            "from_cache": self.from_cache,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "index_updates": self.index_updates,
+            "failed_batches": self.failed_batches,
+        }
+
+
+def create_index_client() -> httpx.AsyncClient:
+    user = os.getenv("OPENSEARCH_USER", "")
+    password = os.getenv("OPENSEARCH_INITIAL_ADMIN_PASSWORD", "")
+    return httpx.AsyncClient(
+        base_url=os.getenv("OPENSEARCH_URL", "https://localhost:9200").rstrip("/"),
+        auth=(user, password) if user and password else None,
+        verify=False,
+        timeout=60,
+    )
+
+
+async def main(args: argparse.Namespace) -> None:
+    settings = Settings()
+    if not settings.GROQ_API_KEY:
+        # без ключа interactor вернёт нейтральные ответы, в кэш они не попадут
+        logging.error("GROQ_API_KEY is required")
+        sys.exit(1)
+
+    cache = AnalysisCache(
+        settings.ANALYSIS_CACHE_PATH,
+        max_entries=settings.ANALYSIS_CACHE_MAX_ENTRIES,
+        pin_writes=True,
+    )
+    interactor = AsyncGroqAPIInteractor(
+        settings.GROQ_API_KEY,
+        settings.GROQ_MODEL,
+        base_url=settings.GROQ_BASE_URL,
+        timeout=settings.GROQ_TIMEOUT,
+        max_connections=args.concurrency,
+        analysis_cache=cache,
+        lyrics_token_budget=settings.GROQ_LYRICS_TOKEN_BUDGET,
+        limiter=AdaptiveRateLimiter(
+            "groq", rate=settings.GROQ_RATE_LIMIT, max_concurrency=args.concurrency
+        ),
+    )
+    index_client = None if args.no_index else create_index_client()
+    index_name = os.getenv("OPENSEARCH_INDEX", "music_ceds_semantic")
+
+    enricher = CatalogEnricher(
+        interactor,
+        cache,
+        Checkpoint(args.checkpoint),
+        index_client=index_client,
+        index_name=index_name,
+        concurrency=args.concurrency,
+    )
+    try:
+        if args.csv and os.path.exists(args.csv):
+            # у песен из CSV нет документа в индексе — только кэш
+            await enricher.run(
+                "csv", batched(iter_csv_songs(args.csv), args.batch_size)
+            )
+
+        if index_client:
+            r = await index_client.put(
+                f"/{index_name}/_mapping", json=ENRICHMENT_MAPPING
+            )
+            r.raise_for_status()
+            await enricher.run(
+                "index",
+                batched(iter_index_songs(index_client, index_name), args.batch_size),
+                checkpointed=False,
+            )
+    finally:
+        await interactor.aclose()
+        if index_client:
+            await index_client.aclose()
+        cache.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--csv", default="./data/songs.csv")
+    parser.add_argument(
+        "--no-index", action="store_true", help="не ходить в OpenSearch"
+    )
+    parser.add_argument("--batch-size", type=int, default=10, help="песен на вызов LLM")
+    parser.add_argument(
+        "--concurrency", type=int, default=4, help="вызовов LLM одновременно"
+    )
+    parser.add_argument("--checkpoint", default="./data/enrich_checkpoint.json")
+    args = parser.parse_args()
+
+    if args.batch_size < 1:
+        parser.error("--batch-size must be positive")
+    asyncio.run(main(args))
@@ -26,14 +26,45 @@ async def start_worker():
             genius_token=settings.GENIUS_API_TOKEN,
             groq_api_key=settings.GROQ_API_KEY,
             groq_model=settings.GROQ_MODEL,
+            csv_compact_every=settings.CSV_COMPACT_EVERY,
+            repo_backend=settings.LYRICS_BACKEND,
+            sqlite_path=settings.SQLITE_PATH,
+            genius_workers=settings.GENIUS_WORKERS,
+            groq_base_url=settings.GROQ_BASE_URL,
+            groq_timeout=settings.GROQ_TIMEOUT,
+            groq_max_connections=settings.GROQ_MAX_CONNECTIONS,
+            analysis_cache_path=settings.ANALYSIS_CACHE_PATH,
+            analysis_cache_max_entries=settings.ANALYSIS_CACHE_MAX_ENTRIES,
+            genius_not_found_ttl=settings.GENIUS_NOT_FOUND_TTL,
+            genius_error_ttl=settings.GENIUS_ERROR_TTL,
+            rabbit_max_concurrency=settings.RABBIT_MAX_CONCURRENCY,
+            rabbit_prefetch_count=settings.RABBIT_PREFETCH_COUNT or None,
+            groq_batch_window_ms=settings.GROQ_BATCH_WINDOW_MS,
+            groq_batch_max_songs=settings.GROQ_BATCH_MAX_SONGS,
+            groq_lyrics_token_budget=settings.GROQ_LYRICS_TOKEN_BUDGET,
+            genius_rate_limit=settings.GENIUS_RATE_LIMIT,
+            groq_rate_limit=settings.GROQ_RATE_LIMIT,
+            prefetch_top_n=settings.PREFETCH_TOP_N,
+            prefetch_queue_size=settings.PREFETCH_QUEUE_SIZE,
+            prefetch_artists_per_minute=settings.PREFETCH_ARTISTS_PER_MINUTE,
+            search_service_url=settings.OPENSEARCH_SERVICE_URL,
+            catalog_lookup_timeout=settings.CATALOG_LOOKUP_TIMEOUT,
+            genius_lookup_timeout=settings.GENIUS_LOOKUP_TIMEOUT,
+            breaker_failure_threshold=settings.BREAKER_FAILURE_THRESHOLD,
+            breaker_recovery_timeout=settings.BREAKER_RECOVERY_TIMEOUT,
         )
         processor.start()
 
+        if settings.STATS_LOG_INTERVAL <= 0:
+            # статистика в лог выключена — просто работаем до остановки
+            await asyncio.Future()
+
         while True:
-            await asyncio.sleep(1)
-    except KeyboardInterrupt:
+            await asyncio.sleep(settings.STATS_LOG_INTERVAL)
+            logging.info(f"[stats] {processor.stats()}")
+    except (KeyboardInterrupt, asyncio.CancelledError):
         logging.info("Stop lyrics processing")
-        processor.stop()
+        await processor.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,96 @@
+# app/analysis_batcher.py
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from src.llm_groq import AsyncGroqAPIInteractor
+
+
+class AnalysisBatcher:
+    """
+    Копит песни из нескольких сообщений в течение короткого окна (window_ms)
+    или до max_songs и разбирает их одним вызовом Groq.
+
+    Снаружи выглядит как AsyncGroqAPIInteractor.analyze_songs_with_llm,
+    каждый вызывающий получает свой query и свои songs_texts.
+    """
+
+    def __init__(
+        self,
+        interactor: AsyncGroqAPIInteractor,
+        window_ms: float = 20,
+        max_songs: int = 30,
+    ):
+        self.interactor = interactor
+        self.window = window_ms / 1000
+        self.max_songs = max_songs
+
+        self._pending: List[Tuple[List[Dict[str, str]], asyncio.Future]] = []
+        self._pending_songs = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+        self.batches = 0
+        self.messages = 0
+        self.songs = 0
+
+    async def analyze_songs_with_llm(
+        self, songs: List[Dict[str, str]]
+    ) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+
+        self._pending.append((songs, fut))
+        self._pending_songs += len(songs)
+
+        if self._pending_songs >= self.max_songs:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+
+        return await fut
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending, self._pending_songs = self._pending, [], 0
+        if not batch:
+            return
+
+        task = asyncio.create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(
+        self, batch: List[Tuple[List[Dict[str, str]], asyncio.Future]]
+    ) -> None:
+        self.batches += 1
+        self.messages += len(batch)
+        self.songs += sum(len(songs) for songs, _ in batch)
+
+        try:
+            results = await self.interactor.analyze_song_groups(
+                [songs for songs, _ in batch]
+            )
+        except Exception as e:
+            logging.error(f"[batcher] Batched analysis failed: {e}")
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+
+        for (_, fut), result in zip(batch, results):
+            if not fut.done():
+                fut.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "messages": self.messages,
+            "songs": self.songs,
+            "avg_messages_per_batch": round(self.messages / self.batches, 2)
+            if self.batches
+            else 0.0,
+        }
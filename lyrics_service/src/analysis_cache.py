@@ -0,0 +1,197 @@
+# app/analysis_cache.py
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from src.utils import LYRICS_ERROR_PREFIX, normalize_song_key
+
+
+def lyrics_hash(lyrics: str) -> str:
+    return hashlib.sha1(lyrics.encode("utf-8")).hexdigest()
+
+
+def is_cacheable(song: Dict[str, str]) -> bool:
+    """Разбор песни можно кэшировать: есть исполнитель, название и настоящий текст."""
+    lyrics = song.get("lyrics") or ""
+    return bool(
+        song.get("artist")
+        and song.get("song")
+        and lyrics.strip()
+        and not lyrics.startswith(LYRICS_ERROR_PREFIX)
+    )
+
+
+class AnalysisCache:
+    """
+    Постоянный LRU-кэш разбора песен LLM'ом: summary + keywords.
+
+    Ключ — нормализованные (artist, song) и хэш текста, так что новый текст той
+    же песни (например, из другого источника) анализируется заново.
+    Размер ограничен max_entries; вытесняются давно не читанные записи.
+    Закреплённые записи (pinned, их пишет enrich_catalog.py с pin_writes=True)
+    не вытесняются и в лимит не входят.
+    """
+
+    def __init__(
+        self, db_path: str, max_entries: int = 50_000, pin_writes: bool = False
+    ):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.pin_writes = pin_writes
+        self.hits = 0
+        self.misses = 0
+
+        dirname = os.path.dirname(db_path)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._puts_since_evict = 0
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # кэш можно пересобрать: после сбоя питания не страшно потерять
+        # последние записи, а fsync на каждый commit не нужен
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS analyses (
+                artist_key  TEXT NOT NULL,
+                track_key   TEXT NOT NULL,
+                lyrics_hash TEXT NOT NULL,
+                summary     TEXT NOT NULL,
+                keywords    TEXT NOT NULL,
+                accessed_at REAL NOT NULL,
+                pinned      INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (artist_key, track_key, lyrics_hash)
+            )
+            """
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(analyses)")}
+        if "pinned" not in columns:
+            # база от предыдущей версии
+            self._conn.execute(
+                "ALTER TABLE analyses ADD COLUMN pinned INTEGER NOT NULL DEFAULT 0"
+            )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS analyses_accessed ON analyses (accessed_at)"
+        )
+        self._conn.commit()
+
+    def get(self, artist: str, song: str, lyrics: str) -> Optional[Dict[str, Any]]:
+        return self.get_many([(artist, song, lyrics)])[0]
+
+    def get_many(
+        self, songs: Sequence[Tuple[str, str, str]]
+    ) -> List[Optional[Dict[str, Any]]]:
+        """
+        Разборы для [(artist, song, lyrics)] — по одному на песню или None.
+        accessed_at попаданий обновляется одним commit'ом на весь вызов.
+        """
+        keys = [
+            (*normalize_song_key(artist, song), lyrics_hash(lyrics))
+            for artist, song, lyrics in songs
+        ]
+        found = []
+        with self._lock:
+            rows = [
+                self._conn.execute(
+                    "SELECT summary, keywords FROM analyses "
+                    "WHERE artist_key = ? AND track_key = ? AND lyrics_hash = ?",
+                    key,
+                ).fetchone()
+                for key in keys
+            ]
+            touched = [key for key, row in zip(keys, rows) if row is not None]
+            self.hits += len(touched)
+            self.misses += len(keys) - len(touched)
+
+            if touched:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE analyses SET accessed_at = ? "
+                    "WHERE artist_key = ? AND track_key = ? AND lyrics_hash = ?",
+                    [(now, *key) for key in touched],
+                )
+                self._conn.commit()
+
+        for (artist, song, _), row in zip(songs, rows):
+            found.append(
+                None
+                if row is None
+                else {
+                    "artist": artist,
+                    "song": song,
+                    "summary": row[0],
+                    "keywords": json.loads(row[1]),
+                }
+            )
+        return found
+
+    def put(
+        self, artist: str, song: str, lyrics: str, summary: str, keywords: list
+    ) -> None:
+        self.put_many([(artist, song, lyrics, summary, keywords)])
+
+    def put_many(self, analyses: Sequence[Tuple[str, str, str, str, list]]) -> None:
+        """Сохраняет [(artist, song, lyrics, summary, keywords)] одним commit'ом."""
+        if not analyses:
+            return
+        now = time.time()
+        rows = [
+            (
+                *normalize_song_key(artist, song),
+                lyrics_hash(lyrics),
+                summary,
+                json.dumps(keywords, ensure_ascii=False),
+                now,
+                int(self.pin_writes),
+            )
+            for artist, song, lyrics, summary, keywords in analyses
+        ]
+        with self._lock:
+            # закреплённая запись остаётся закреплённой и после перезаписи
+            self._conn.executemany(
+                "INSERT INTO analyses VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (artist_key, track_key, lyrics_hash) DO UPDATE SET "
+                "summary = excluded.summary, keywords = excluded.keywords, "
+                "accessed_at = excluded.accessed_at, "
+                "pinned = MAX(pinned, excluded.pinned)",
+                rows,
+            )
+            self._conn.commit()
+
+            # COUNT(*) на каждую вставку дорог — вытесняем пачками
+            self._puts_since_evict += len(rows)
+            if self._puts_since_evict >= 100:
+                self._puts_since_evict = 0
+                self._evict()
+
+    def _evict(self) -> None:
+        (count,) = self._conn.execute(
+            "SELECT COUNT(*) FROM analyses WHERE pinned = 0"
+        ).fetchone()
+        extra = count - self.max_entries
+        if extra <= 0:
+            return
+        self._conn.execute(
+            "DELETE FROM analyses WHERE rowid IN (SELECT rowid FROM analyses "
+            "WHERE pinned = 0 ORDER BY accessed_at LIMIT ?)",
+            (extra,),
+        )
+        self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -1,7 +1,76 @@
 # app/llm_groq.py
+import asyncio
 import json
 import requests
-from typing import Any, Dict, List
+import httpx
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.analysis_cache import AnalysisCache, is_cacheable
+from src.circuit_breaker import CircuitBreaker, CircuitOpenError
+from src.lyrics_condenser import fit_to_budget
+from src.rate_limiter import AdaptiveRateLimiter
+from src.utils import LYRICS_ERROR_PREFIX, normalize_song_key
+
+
+SYSTEM_PROMPT = (
+    "You are a music-lyrics analyst. Output MUST be valid JSON only. "
+    "No markdown. No explanations. No extra keys. English only.\n"
+    "Rules:\n"
+    "1) query: 12–15 words, a natural sentence about emotions/themes. "
+    "No leading words like 'Analyzing', 'Analysis', 'Themes', 'Keywords'.\n"
+    "2) For each song: summary is 2–3 sentences, 25–40 words total. "
+    "Include emotional tone + situation/conflict + one vivid detail. "
+    "Do NOT mention 'lyrics' or 'song'.\n"
+    "3) keywords: exactly 3 items; lowercase; 1–2 words each; meaningful.\n"
+    "4) If lyrics are empty or error-like, keep summary neutral and keywords generic.\n"
+    "5) 'analyzed' (if present) lists songs that are already summarized: use them "
+    "for query only and do NOT return them in songs_texts.\n"
+    "JSON schema:\n"
+    '{"query":"...","songs_texts":[{"artist":"","song":"","summary":"","keywords":[""]}]}'
+)
+
+# несколько запросов в одном вызове (см. AnalysisBatcher): тексты общие,
+# query — отдельный на каждый request_id
+BATCH_SYSTEM_PROMPT = (
+    SYSTEM_PROMPT.split("JSON schema:")[0]
+    + "6) Input has 'lyrics' (every song to summarize, once) and 'requests'. "
+    "Each request lists its songs by artist/song and may have 'analyzed'. "
+    "Write one query per request_id from that request's songs only.\n"
+    "JSON schema:\n"
+    '{"queries":[{"request_id":"","query":"..."}],'
+    '"songs_texts":[{"artist":"","song":"","summary":"","keywords":[""]}]}'
+)
+
+
+# бюджет ответа: query (с обёрткой JSON) на запрос + разбор на песню —
+# summary 25–40 слов, 3 keywords, artist/song; 350 — прежний бюджет вызова
+QUERY_TOKENS = 100
+SONG_TOKENS = 100
+MIN_COMPLETION_TOKENS = 350
+MAX_COMPLETION_TOKENS = 4096
+
+
+def completion_budget(requests_count: int, songs_count: int) -> int:
+    """max_tokens для ответа с requests_count query и songs_count разборами."""
+    return min(
+        max(
+            MIN_COMPLETION_TOKENS * requests_count,
+            QUERY_TOKENS * requests_count + SONG_TOKENS * songs_count,
+        ),
+        MAX_COMPLETION_TOKENS,
+    )
+
+
+# разбор-заглушка, когда LLM не ответил или ответил не по схеме
+NEUTRAL_SUMMARY = (
+    "Insufficient text was available to infer detailed themes confidently."
+)
+
+
+def is_analyzed(song_text: Dict[str, Any]) -> bool:
+    """Разбор из ответа analyze_songs_with_llm настоящий, а не заглушка."""
+    summary = song_text.get("summary")
+    return bool(summary) and summary != NEUTRAL_SUMMARY
 
 
 class GroqError(RuntimeError):
@@ -9,10 +78,20 @@ class GroqError(RuntimeError):
 
 
 class GroqAPIInteractor:
-    def __init__(self, api_key: str, model: str):
+    def __init__(
+        self,
+        api_key: str,
+        model: str,
+        base_url: str = "https://api.groq.com/openai/v1",
+        analysis_cache: Optional[AnalysisCache] = None,
+        lyrics_token_budget: int = 2500,
+    ):
         self.api_key = api_key
         self.model = model
-        self.base_url = "https://api.groq.com/openai/v1"
+        self.base_url = base_url.rstrip("/")
+        self.analysis_cache = analysis_cache
+        # бюджет на тексты всех песен одного запроса (без учёта system prompt)
+        self.lyrics_token_budget = lyrics_token_budget
 
     def analyze_songs_with_llm(self, songs: List[Dict[str, str]]) -> Dict[str, Any]:
         """
@@ -30,105 +109,468 @@ class GroqAPIInteractor:
                 songs, query="unable to analyze themes because LLM API key is missing"
             )
 
+        cached, pending = self._split_cached(songs)
+        payload = self._build_payload(pending, list(cached.values()))
+
+        url = f"{self.base_url}/chat/completions"
+
+        try:
+            r = requests.post(url, headers=self._headers(), json=payload, timeout=30)
+            if r.status_code >= 400:
+                result = self._neutral_result(
+                    pending, query=f"LLM request failed with HTTP {r.status_code}"
+                )
+            else:
+                result = self._parse_response(pending, r.json())
+
+        except Exception:
+            result = self._neutral_result(
+                pending, query="LLM analysis timed out or failed unexpectedly"
+            )
+
+        return self._merge_cached(songs, cached, pending, result)
+
+    def _headers(self) -> Dict[str, str]:
+        return {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+        }
+
+    def _split_cached(
+        self, songs: List[Dict[str, str]]
+    ) -> Tuple[Dict[int, Dict[str, Any]], List[Dict[str, str]]]:
+        """{позиция: готовый разбор из кэша}, песни для LLM."""
+        cached: Dict[int, Dict[str, Any]] = {}
+        pending: List[Dict[str, str]] = []
+
+        lookups = [
+            i for i, s in enumerate(songs) if self.analysis_cache and is_cacheable(s)
+        ]
+        if lookups:
+            hits = self.analysis_cache.get_many(
+                [
+                    (songs[i]["artist"], songs[i]["song"], songs[i]["lyrics"])
+                    for i in lookups
+                ]
+            )
+            cached = {i: hit for i, hit in zip(lookups, hits) if hit}
+
+        for i, s in enumerate(songs):
+            if i not in cached:
+                pending.append(s)
+
+        return cached, pending
+
+    def _merge_cached(
+        self,
+        songs: List[Dict[str, str]],
+        cached: Dict[int, Dict[str, Any]],
+        pending: List[Dict[str, str]],
+        result: Dict[str, Any],
+        by_position: bool = True,
+    ) -> Dict[str, Any]:
+        fresh = iter(self._match_results(pending, result["songs_texts"], by_position))
+        songs_texts = [
+            cached[i] if i in cached else (next(fresh) or self._neutral_song(s))
+            for i, s in enumerate(songs)
+        ]
+        return {"query": result["query"], "songs_texts": songs_texts}
+
+    def _match_results(
+        self,
+        songs: List[Dict[str, str]],
+        songs_texts: List[Dict[str, Any]],
+        by_position: bool = True,
+    ) -> List[Optional[Dict[str, Any]]]:
+        """Раскладывает ответ LLM по входным песням: по имени, иначе по позиции."""
+        by_key = {
+            normalize_song_key(str(t.get("artist", "")), str(t.get("song", ""))): t
+            for t in songs_texts
+            if isinstance(t, dict)
+        }
+        # по позиции — только если LLM вернул по разбору на песню: иначе
+        # пропуск одной песни сдвинул бы чужие разборы на соседние
+        by_position = by_position and len(songs_texts) == len(songs)
+        matched = []
+        for i, s in enumerate(songs):
+            t = by_key.get(normalize_song_key(s.get("artist", ""), s.get("song", "")))
+            if (
+                t is None
+                and by_position
+                and i < len(songs_texts)
+                and isinstance(songs_texts[i], dict)
+            ):
+                t = songs_texts[i]
+            matched.append(t)
+        return matched
+
+    def _remember(
+        self,
+        songs: List[Dict[str, str]],
+        songs_texts: List[Dict[str, Any]],
+        by_position: bool = True,
+    ) -> None:
+        if not self.analysis_cache:
+            return
+        self.analysis_cache.put_many(
+            [
+                (
+                    s["artist"],
+                    s["song"],
+                    s["lyrics"],
+                    t["summary"],
+                    t.get("keywords") or [],
+                )
+                for s, t in zip(
+                    songs, self._match_results(songs, songs_texts, by_position)
+                )
+                if t and is_cacheable(s) and t.get("summary")
+            ]
+        )
+
+    def _build_payload(
+        self,
+        songs: List[Dict[str, str]],
+        analyzed: Optional[List[Dict[str, Any]]] = None,
+    ) -> Dict[str, Any]:
+        texts = self._condense_lyrics(
+            [s.get("lyrics", "") for s in songs], self.lyrics_token_budget
+        )
         compact = [
             {
                 "artist": s.get("artist", ""),
                 "song": s.get("song", ""),
-                "lyrics": self._clean_lyrics_for_llm(s.get("lyrics", "")),
+                "lyrics": text,
             }
-            for s in songs
+            for s, text in zip(songs, texts)
         ]
 
-        system = (
-            "You are a music-lyrics analyst. Output MUST be valid JSON only. "
-            "No markdown. No explanations. No extra keys. English only.\n"
-            "Rules:\n"
-            "1) query: 12–15 words, a natural sentence about emotions/themes. "
-            "No leading words like 'Analyzing', 'Analysis', 'Themes', 'Keywords'.\n"
-            "2) For each song: summary is 2–3 sentences, 25–40 words total. "
-            "Include emotional tone + situation/conflict + one vivid detail. "
-            "Do NOT mention 'lyrics' or 'song'.\n"
-            "3) keywords: exactly 3 items; lowercase; 1–2 words each; meaningful.\n"
-            "4) If lyrics are empty or error-like, keep summary neutral and keywords generic.\n"
-            "JSON schema:\n"
-            '{"query":"...","songs_texts":[{"artist":"","song":"","summary":"","keywords":[""]}]}'
-        )
+        content: Dict[str, Any] = {"songs": compact}
+        if analyzed:
+            # уже разобранные песни идут в промпт только выжимкой — для query
+            content["analyzed"] = [
+                {
+                    "artist": a["artist"],
+                    "song": a["song"],
+                    "summary": a["summary"],
+                    "keywords": a["keywords"],
+                }
+                for a in analyzed
+            ]
 
-        payload = {
+        return {
             "model": self.model,
             "temperature": 0.2,
-            "max_tokens": 350,
+            # пачка из 10 песен в 350 токенов не помещается — JSON обрывается
+            "max_tokens": completion_budget(1, len(songs)),
             "messages": [
-                {"role": "system", "content": system},
+                {"role": "system", "content": SYSTEM_PROMPT},
                 {
                     "role": "user",
-                    "content": json.dumps({"songs": compact}, ensure_ascii=False),
+                    "content": json.dumps(content, ensure_ascii=False),
                 },
             ],
             # response_format иногда у Groq работает не везде; лучше не ломать весь воркер из-за этого
         }
 
-        url = f"{self.base_url}/chat/completions"
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
+    def _parse_response(
+        self, songs: List[Dict[str, str]], data: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        content = data["choices"][0]["message"]["content"]
+        obj = json.loads(content)
+
+        if not isinstance(obj, dict) or "query" not in obj or "songs_texts" not in obj:
+            return self._neutral_result(songs, query="LLM returned invalid JSON schema")
+
+        self._remember(songs, obj["songs_texts"])
+        return obj
+
+    def _condense_lyrics(self, texts: List[str], token_budget: int) -> List[str]:
+        # строки-ошибки LLM не нужны целиком — достаточно, что текста нет
+        return fit_to_budget(
+            [
+                "" if (t or "").startswith(LYRICS_ERROR_PREFIX) else (t or "")
+                for t in texts
+            ],
+            token_budget,
+        )
+
+    def _neutral_result(
+        self, songs: List[Dict[str, str]], query: str = ""
+    ) -> Dict[str, Any]:
+        # чтобы воркер никогда не "молчал" из-за исключения
+        out = [self._neutral_song(s) for s in songs]
+        return {
+            "query": query
+            or "mixed emotions and unresolved tension across fragmented, incomplete lyrical snapshots",
+            "songs_texts": out,
         }
 
+    def _neutral_song(self, song: Dict[str, str]) -> Dict[str, Any]:
+        return {
+            "artist": song.get("artist", ""),
+            "song": song.get("song", ""),
+            "summary": NEUTRAL_SUMMARY,
+            "keywords": [
+                "unclear",
+                "missing text",
+                "fragmented",
+                "neutral",
+                "unknown",
+            ],
+        }
+
+
+class AsyncGroqAPIInteractor(GroqAPIInteractor):
+    """
+    То же самое, но через httpx.AsyncClient: один долгоживущий пул keep-alive
+    соединений на воркер, запрос не блокирует event loop.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        model: str,
+        base_url: str = "https://api.groq.com/openai/v1",
+        timeout: float = 30.0,
+        max_connections: int = 10,
+        analysis_cache: Optional[AnalysisCache] = None,
+        lyrics_token_budget: int = 2500,
+        limiter: Optional[AdaptiveRateLimiter] = None,
+        max_retries: int = 2,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        super().__init__(api_key, model, base_url, analysis_cache, lyrics_token_budget)
+        self.timeout = timeout
+        self.limiter = limiter
+        self.max_retries = max_retries
+        self.breaker = breaker
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers=self._headers(),
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+        )
+
+    async def analyze_songs_with_llm(
+        self, songs: List[Dict[str, str]], timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """timeout — дедлайн конкретного вызова, по умолчанию self.timeout."""
+        if not self.api_key:
+            return self._neutral_result(
+                songs, query="unable to analyze themes because LLM API key is missing"
+            )
+
+        # кэш разборов — SQLite с commit'ами, в loop его не зовём
+        cached, pending = await asyncio.to_thread(self._split_cached, songs)
+        payload = self._build_payload(pending, list(cached.values()))
+
         try:
-            r = requests.post(url, headers=headers, json=payload, timeout=30)
+            r = await self._post(payload, timeout or self.timeout)
             if r.status_code >= 400:
-                return self._neutral_result(
-                    songs, query=f"LLM request failed with HTTP {r.status_code}"
+                result = self._neutral_result(
+                    pending, query=f"LLM request failed with HTTP {r.status_code}"
+                )
+            else:
+                # разбор ответа сохраняет удачные анализы в кэш
+                result = await asyncio.to_thread(
+                    self._parse_response, pending, r.json()
                 )
-            data = r.json()
-            content = data["choices"][0]["message"]["content"]
-            obj = json.loads(content)
 
-            if (
-                not isinstance(obj, dict)
-                or "query" not in obj
-                or "songs_texts" not in obj
-            ):
-                return self._neutral_result(
-                    songs, query="LLM returned invalid JSON schema"
+        except Exception:
+            result = self._neutral_result(
+                pending, query="LLM analysis timed out or failed unexpectedly"
+            )
+
+        return self._merge_cached(songs, cached, pending, result)
+
+    async def analyze_song_groups(
+        self, groups: List[List[Dict[str, str]]], timeout: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Разбор нескольких запросов одним вызовом LLM.
+        Возвращает по результату analyze_songs_with_llm на каждую группу.
+        """
+        if len(groups) == 1:
+            return [await self.analyze_songs_with_llm(groups[0], timeout)]
+
+        if not self.api_key:
+            return [
+                self._neutral_result(
+                    g, query="unable to analyze themes because LLM API key is missing"
                 )
+                for g in groups
+            ]
+
+        splits = await asyncio.to_thread(
+            lambda: [self._split_cached(g) for g in groups]
+        )
+        unique: Dict[Any, Dict[str, str]] = {}
+        for _, pending in splits:
+            for s in pending:
+                unique.setdefault(normalize_song_key(s["artist"], s["song"]), s)
+        lyrics = list(unique.values())
 
-            return obj
+        payload = self._build_batch_payload(splits, lyrics)
+
+        try:
+            r = await self._post(payload, timeout or self.timeout)
+            if r.status_code >= 400:
+                results = [
+                    self._neutral_result(
+                        pending, query=f"LLM request failed with HTTP {r.status_code}"
+                    )
+                    for _, pending in splits
+                ]
+            else:
+                results = await asyncio.to_thread(
+                    self._parse_batch_response, splits, lyrics, r.json()
+                )
 
         except Exception:
-            return self._neutral_result(
-                songs, query="LLM analysis timed out or failed unexpectedly"
+            results = [
+                self._neutral_result(
+                    pending, query="LLM analysis timed out or failed unexpectedly"
+                )
+                for _, pending in splits
+            ]
+
+        return [
+            self._merge_cached(g, cached, pending, res, by_position=False)
+            for g, (cached, pending), res in zip(groups, splits, results)
+        ]
+
+    async def _post(self, payload: Dict[str, Any], timeout: float) -> httpx.Response:
+        if self.breaker is None:
+            return await self._send(payload, timeout)
+
+        # открытый предохранитель — сразу нейтральный ответ у вызывающего
+        if not self.breaker.allow():
+            raise CircuitOpenError("Groq circuit is open")
+        try:
+            r = await self._send(payload, timeout)
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        if r.status_code >= 500:
+            self.breaker.record_failure()
+        elif r.status_code != 429:
+            # 429 после всех повторов — Groq жив, но душит нас: это работа
+            # лимитера, и пробный вызов half_open не должен закрыть предохранитель
+            self.breaker.record_success()
+        return r
+
+    async def _send(self, payload: Dict[str, Any], timeout: float) -> httpx.Response:
+        if self.limiter is None:
+            return await self._client.post(
+                "/chat/completions", json=payload, timeout=timeout
             )
 
-    def _clean_lyrics_for_llm(self, text: str, limit: int = 1800) -> str:
-        if not text:
-            return ""
-        t = text.replace("\r", "\n")
-        t = "\n".join([ln.strip() for ln in t.splitlines() if ln.strip()])
-        return t[:limit]
+        # 429 не превращаем сразу в нейтральный ответ: лимитер ждёт Retry-After
+        # и снижает параллельность, затем пробуем ещё раз
+        for _ in range(self.max_retries + 1):
+            async with self.limiter.slot() as slot:
+                r = await self._client.post(
+                    "/chat/completions", json=payload, timeout=timeout
+                )
+                if r.status_code == 429:
+                    slot.throttled(_retry_after(r))
+                elif r.status_code >= 500:
+                    slot.failed()
+            if r.status_code != 429:
+                break
+        return r
 
-    def _neutral_result(
-        self, songs: List[Dict[str, str]], query: str = ""
+    def _build_batch_payload(
+        self,
+        splits: List[Tuple[Dict[int, Dict[str, Any]], List[Dict[str, str]]]],
+        lyrics: List[Dict[str, str]],
     ) -> Dict[str, Any]:
-        # чтобы воркер никогда не "молчал" из-за исключения
-        out = []
-        for s in songs:
-            out.append(
-                {
-                    "artist": s.get("artist", ""),
-                    "song": s.get("song", ""),
-                    "summary": "Insufficient text was available to infer detailed themes confidently.",
-                    "keywords": [
-                        "unclear",
-                        "missing text",
-                        "fragmented",
-                        "neutral",
-                        "unknown",
-                    ],
-                }
-            )
+        requests_ = []
+        for i, (cached, pending) in enumerate(splits):
+            req: Dict[str, Any] = {
+                "request_id": str(i),
+                "songs": [{"artist": s["artist"], "song": s["song"]} for s in pending],
+            }
+            if cached:
+                req["analyzed"] = [
+                    {
+                        "artist": a["artist"],
+                        "song": a["song"],
+                        "summary": a["summary"],
+                        "keywords": a["keywords"],
+                    }
+                    for a in cached.values()
+                ]
+            requests_.append(req)
+
+        # бюджет — как у одиночных вызовов, по одному на каждый запрос в пачке
+        texts = self._condense_lyrics(
+            [s.get("lyrics", "") for s in lyrics],
+            self.lyrics_token_budget * len(splits),
+        )
+        content = {
+            "lyrics": [
+                {"artist": s["artist"], "song": s["song"], "lyrics": text}
+                for s, text in zip(lyrics, texts)
+            ],
+            "requests": requests_,
+        }
+
         return {
-            "query": query
-            or "mixed emotions and unresolved tension across fragmented, incomplete lyrical snapshots",
-            "songs_texts": out,
+            "model": self.model,
+            "temperature": 0.2,
+            "max_tokens": completion_budget(len(splits), len(lyrics)),
+            "messages": [
+                {"role": "system", "content": BATCH_SYSTEM_PROMPT},
+                {"role": "user", "content": json.dumps(content, ensure_ascii=False)},
+            ],
         }
+
+    def _parse_batch_response(
+        self,
+        splits: List[Tuple[Dict[int, Dict[str, Any]], List[Dict[str, str]]]],
+        lyrics: List[Dict[str, str]],
+        data: Dict[str, Any],
+    ) -> List[Dict[str, Any]]:
+        content = data["choices"][0]["message"]["content"]
+        obj = json.loads(content)
+
+        if (
+            not isinstance(obj, dict)
+            or not isinstance(obj.get("queries"), list)
+            or not isinstance(obj.get("songs_texts"), list)
+        ):
+            return [
+                self._neutral_result(pending, query="LLM returned invalid JSON schema")
+                for _, pending in splits
+            ]
+
+        self._remember(lyrics, obj["songs_texts"], by_position=False)
+
+        queries = {
+            str(q.get("request_id")): q.get("query")
+            for q in obj["queries"]
+            if isinstance(q, dict)
+        }
+        return [
+            {
+                "query": queries.get(str(i)) or self._neutral_result([])["query"],
+                "songs_texts": obj["songs_texts"],
+            }
+            for i in range(len(splits))
+        ]
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+def _retry_after(r: httpx.Response) -> Optional[float]:
+    # Groq присылает Retry-After в секундах; даты и мусор игнорируем
+    try:
+        return min(float(r.headers.get("retry-after", "")), 60.0)
+    except ValueError:
+        return None
@@ -1,8 +1,37 @@
+from typing import List, Optional, Tuple
+
 import lyricsgenius
 
+from src import rate_limiter
+from src.circuit_breaker import CircuitBreaker
+from src.negative_cache import NegativeLyricsCache
+from src.utils import LYRICS_ERROR_PREFIX
+
+# lyricsgenius отдаёт 429 как HTTPError "[Errno 429] Too Many Requests",
+# таймауты requests — как "... Read timed out."
+THROTTLE_MARKERS = ("429", "Too Many Requests")
+TIMEOUT_MARKERS = ("timed out", "Timeout")
+
+
+def classify_genius_error(lyrics: Optional[str]) -> str:
+    """Исход вызова Genius для лимитера по строке-результату fetch_lyrics_from_api."""
+    if not lyrics or not lyrics.startswith(LYRICS_ERROR_PREFIX):
+        return rate_limiter.OK
+    if any(marker in lyrics for marker in THROTTLE_MARKERS):
+        return rate_limiter.THROTTLED
+    if any(marker in lyrics for marker in TIMEOUT_MARKERS):
+        return rate_limiter.TIMEOUT
+    # "не найдено" — тоже нормальный ответ провайдера
+    return rate_limiter.OK
+
 
 class GiniusInteractor:
-    def __init__(self, token: str):
+    def __init__(
+        self,
+        token: str,
+        negative_cache: Optional[NegativeLyricsCache] = None,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
         self._genius = lyricsgenius.Genius(
             token,
             timeout=8,  # таймаут запросов
@@ -11,19 +40,75 @@ class GiniusInteractor:
             skip_non_songs=True,
             excluded_terms=["(Remix)", "(Live)"],
         )
+        self.negative_cache = negative_cache
+        self.breaker = breaker
 
     def fetch_lyrics_from_api(self, artist: str, song: str) -> str:
         """
         Возвращает текст песни или строку-ошибку вида:
         [Error fetching lyrics]: ...
+        Неудачи записывает в negative_cache; проверять его — у вызывающего,
+        до пула потоков и лимитера (GeniusSource).
         """
         if not artist or not song:
-            return "[Error fetching lyrics]: Empty artist/song"
+            return f"{LYRICS_ERROR_PREFIX}: Empty artist/song"
+
+        # Genius лежит — не ждём таймаутов, сразу отвечаем ошибкой (в кэш не пишем)
+        if self.breaker and not self.breaker.allow():
+            return f"{LYRICS_ERROR_PREFIX}: Genius is unavailable (circuit open)"
 
         try:
-            song = self._genius.search_song(title=song, artist=artist)
-            if not song or not getattr(song, "lyrics", None):
-                return "[Error fetching lyrics]: Not found on Genius"
-            return song.lyrics
+            found = self._genius.search_song(title=song, artist=artist)
+            self._record(ok=True)
+            if not found or not getattr(found, "lyrics", None):
+                error = f"{LYRICS_ERROR_PREFIX}: Not found on Genius"
+                if self.negative_cache:
+                    self.negative_cache.record_not_found(artist, song, error)
+                return error
+            return found.lyrics
+        except Exception as e:
+            error = f"{LYRICS_ERROR_PREFIX}: {e}"
+            # 429 — это про нашу частоту запросов, а не про песню: не запоминаем
+            throttled = classify_genius_error(error) == rate_limiter.THROTTLED
+            # 429 — Genius отвечает, но это работа лимитера: состояние предохранителя
+            # не трогаем (успехом не считаем — пробный вызов half_open не закроет его)
+            if not throttled:
+                self._record(ok=False)
+            if self.negative_cache and not throttled:
+                self.negative_cache.record_error(artist, song, error)
+            return error
+
+    def _record(self, ok: bool) -> None:
+        if not self.breaker:
+            return
+        if ok:
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+
+    def fetch_artist_top_songs(
+        self, artist: str, max_songs: int = 5
+    ) -> List[Tuple[str, str]]:
+        """
+        Самые популярные песни исполнителя с текстами: [(название, текст)].
+        Для фоновой подгрузки — ошибки не пробрасываются, просто пустой список.
+        """
+        if self.breaker and not self.breaker.allow():
+            return []
+        try:
+            found = self._genius.search_artist(
+                artist, max_songs=max_songs, sort="popularity", get_full_info=False
+            )
         except Exception as e:
-            return f"[Error fetching lyrics]: {e}"
+            error = f"{LYRICS_ERROR_PREFIX}: {e}"
+            if classify_genius_error(error) != rate_limiter.THROTTLED:
+                self._record(ok=False)
+            return []
+        self._record(ok=True)
+        if not found:
+            return []
+        return [
+            (s.title, s.lyrics)
+            for s in found.songs
+            if getattr(s, "title", None) and getattr(s, "lyrics", None)
+        ]
@@ -0,0 +1,77 @@
+# app/lyrics_condenser.py
+import re
+from typing import List
+
+# грубая оценка для английского текста; точный токенайзер тут не нужен
+CHARS_PER_TOKEN = 4
+
+# заголовки Genius ([Chorus], [Verse 2: ...]) и пометки повтора (x2); строки
+# в круглых скобках целиком — бэк-вокал и ad-lib'ы, это часть текста
+_SECTION_HEADER = re.compile(
+    r"^\s*(\[[^\]]*\]|\(\s*(x\s*\d+|\d+\s*x)\s*\))\s*$", re.IGNORECASE
+)
+_GENIUS_EMBED = re.compile(r"\d*\s*Embed\s*$")
+_NON_WORD = re.compile(r"[\W_]+", re.UNICODE)
+
+
+def condense_lyrics(text: str) -> List[str]:
+    """
+    Строки текста без заголовков секций ([Chorus], (x2) ...), пустых строк
+    и повторов: каждый припев и повторяющаяся строка остаются один раз.
+    """
+    if not text:
+        return []
+
+    lines = []
+    seen = set()
+    for raw in text.replace("\r", "\n").splitlines():
+        line = _GENIUS_EMBED.sub("", raw).strip()
+        if not line or _SECTION_HEADER.match(line):
+            continue
+        key = _NON_WORD.sub(" ", line.lower()).strip()
+        if not key or key in seen:
+            continue
+        seen.add(key)
+        lines.append(line)
+    return lines
+
+
+def representative_slice(lines: List[str], char_budget: int) -> str:
+    """
+    Если всё не влезает в char_budget — берём строки равномерно по всему
+    тексту (начало, середина, конец), а не только первые.
+    """
+    text = "\n".join(lines)
+    if len(text) <= char_budget:
+        return text
+    if char_budget <= 0:
+        return ""
+
+    avg_len = len(text) / len(lines)
+    count = max(1, min(len(lines), int(char_budget // avg_len)))
+    step = len(lines) / count
+    picked = [lines[int(i * step)] for i in range(count)]
+    return "\n".join(picked)[:char_budget]
+
+
+def fit_to_budget(
+    lyrics: List[str], token_budget: int, max_chars_per_song: int = 1800
+) -> List[str]:
+    """
+    Ужимает тексты всех песен запроса в общий бюджет токенов.
+    Короткие песни берутся целиком, остаток бюджета делится поровну
+    между длинными.
+    """
+    condensed = [condense_lyrics(t) for t in lyrics]
+    sizes = [min(len("\n".join(ls)), max_chars_per_song) for ls in condensed]
+
+    budget = token_budget * CHARS_PER_TOKEN
+    limits = [0] * len(sizes)
+    remaining = sorted(range(len(sizes)), key=lambda i: sizes[i])
+    while remaining:
+        share = budget // len(remaining)
+        i = remaining.pop(0)
+        limits[i] = min(sizes[i], share)
+        budget -= limits[i]
+
+    return [representative_slice(ls, lim) for ls, lim in zip(condensed, limits)]
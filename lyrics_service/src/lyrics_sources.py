@@ -0,0 +1,228 @@
+# app/lyrics_sources.py
+import asyncio
+import logging
+from concurrent.futures import Executor
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from src import rate_limiter
+from src.circuit_breaker import CircuitBreaker
+from src.lyrics_api import GiniusInteractor, classify_genius_error
+from src.rate_limiter import AdaptiveRateLimiter
+from src.repo_factory import LyricsRepository
+from src.utils import LYRICS_ERROR_PREFIX
+
+
+class LyricsSource:
+    """
+    Один источник текстов в цепочке. Наследники реализуют _lookup:
+    текст, None (нет такой песни) или строку-ошибку с LYRICS_ERROR_PREFIX.
+    """
+
+    name = "source"
+    # True — _lookup сам соблюдает self.timeout и бросает asyncio.TimeoutError
+    handles_timeout = False
+
+    def __init__(
+        self, timeout: Optional[float] = None, breaker: Optional[CircuitBreaker] = None
+    ):
+        self.timeout = timeout
+        self.breaker = breaker
+        self.hits = 0
+        self.misses = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.skipped = 0
+
+    async def lookup(self, artist: str, song: str) -> Optional[str]:
+        # источник недоступен — сразу к следующему в цепочке
+        if self.breaker and not self.breaker.allow():
+            self.skipped += 1
+            return None
+
+        try:
+            if self.timeout and not self.handles_timeout:
+                lyrics = await asyncio.wait_for(
+                    self._lookup(artist, song), timeout=self.timeout
+                )
+            else:
+                lyrics = await self._lookup(artist, song)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            if self.breaker:
+                self.breaker.record_failure()
+            return f"{LYRICS_ERROR_PREFIX}: {self.name} timed out after {self.timeout}s"
+        except Exception as e:
+            self.errors += 1
+            if self.breaker:
+                self.breaker.record_failure()
+            logging.error(f"[sources] {self.name} lookup failed: {e}")
+            return f"{LYRICS_ERROR_PREFIX}: {e}"
+
+        if self.breaker:
+            self.breaker.record_success()
+
+        if lyrics and not lyrics.startswith(LYRICS_ERROR_PREFIX):
+            self.hits += 1
+        else:
+            self.misses += 1
+        return lyrics
+
+    async def _lookup(self, artist: str, song: str) -> Optional[str]:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses + self.timeouts + self.errors
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "skipped": self.skipped,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
+
+
+class RepositorySource(LyricsSource):
+    name = "repo"
+
+    def __init__(self, repo: LyricsRepository, timeout: Optional[float] = None):
+        super().__init__(timeout)
+        self.repo = repo
+
+    async def _lookup(self, artist: str, song: str) -> Optional[str]:
+        # sqlite-репозиторий держит лок на время commit'а upsert'а — не ждём его в loop
+        return await asyncio.to_thread(self.repo.find_lyrics, artist, song)
+
+
+class CatalogSource(LyricsSource):
+    """Точный поиск по каталогу search_service: GET /search/lyrics."""
+
+    name = "catalog"
+
+    def __init__(
+        self,
+        base_url: str,
+        timeout: Optional[float] = 1.0,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        super().__init__(timeout, breaker)
+        self._client = httpx.AsyncClient(
+            base_url=base_url.rstrip("/"),
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=20),
+        )
+
+    async def _lookup(self, artist: str, song: str) -> Optional[str]:
+        r = await self._client.get(
+            "/search/lyrics", params={"artist": artist, "track": song}
+        )
+        if r.status_code == 404:
+            return None
+        r.raise_for_status()
+        return r.json().get("lyrics") or None
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+class GeniusSource(LyricsSource):
+    name = "genius"
+
+    def __init__(
+        self,
+        interactor: GiniusInteractor,
+        executor: Executor,
+        timeout: Optional[float] = 20.0,
+        limiter: Optional[AdaptiveRateLimiter] = None,
+        max_retries: int = 2,
+    ):
+        super().__init__(timeout)
+        self.interactor = interactor
+        self.executor = executor
+        self.limiter = limiter
+        self.max_retries = max_retries
+
+    @property
+    def handles_timeout(self) -> bool:
+        # с лимитером дедлайн внутри слота: иначе отмена снаружи закрыла бы
+        # слот как ERROR (без снижения лимита), пока поток ещё ходит в Genius
+        return self.limiter is not None
+
+    async def _lookup(self, artist: str, song: str) -> Optional[str]:
+        # заведомо отсутствующая песня не ждёт ни пула потоков, ни слота лимитера
+        negative_cache = self.interactor.negative_cache
+        if negative_cache and artist and song:
+            cached_error = negative_cache.get(artist, song)
+            if cached_error:
+                return cached_error
+
+        if self.limiter is None:
+            return await self._fetch(artist, song)
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout if self.timeout else None
+
+        # на 429 лимитер сам притормаживает — повторяем в пределах self.timeout
+        for _ in range(self.max_retries + 1):
+            async with self.limiter.slot() as slot:
+                future = loop.run_in_executor(
+                    self.executor, self.interactor.fetch_lyrics_from_api, artist, song
+                )
+                try:
+                    lyrics = await asyncio.wait_for(
+                        asyncio.shield(future),
+                        timeout=None if deadline is None else deadline - loop.time(),
+                    )
+                except asyncio.TimeoutError:
+                    # таймаут снижает лимит; слот занят, пока поток не вернётся
+                    slot.timed_out()
+                    slot.hold_until(future)
+                    raise
+                except asyncio.CancelledError:
+                    slot.hold_until(future)
+                    raise
+                outcome = classify_genius_error(lyrics)
+                if outcome == rate_limiter.THROTTLED:
+                    slot.throttled()
+                elif outcome == rate_limiter.TIMEOUT:
+                    slot.timed_out()
+            if outcome != rate_limiter.THROTTLED:
+                break
+        return lyrics
+
+    async def _fetch(self, artist: str, song: str) -> Optional[str]:
+        # lyricsgenius синхронный — уводим его в ограниченный пул потоков
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, self.interactor.fetch_lyrics_from_api, artist, song
+        )
+
+
+class LyricsSourceChain:
+    """Опрашивает источники по очереди до первого найденного текста."""
+
+    def __init__(self, sources: List[LyricsSource]):
+        self.sources = sources
+
+    async def resolve(self, artist: str, song: str) -> Tuple[Optional[str], str]:
+        """
+        (текст, имя источника). Если текст нигде не нашёлся — последняя
+        строка-ошибка (или None) и пустое имя источника.
+        """
+        fallback = None
+        for source in self.sources:
+            lyrics = await source.lookup(artist, song)
+            if lyrics and not lyrics.startswith(LYRICS_ERROR_PREFIX):
+                return lyrics, source.name
+            fallback = lyrics or fallback
+        return fallback, ""
+
+    def stats(self) -> Dict[str, Any]:
+        return {source.name: source.stats() for source in self.sources}
+
+    async def aclose(self) -> None:
+        for source in self.sources:
+            if hasattr(source, "aclose"):
+                await source.aclose()
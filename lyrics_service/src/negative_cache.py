@@ -0,0 +1,90 @@
+# app/negative_cache.py
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from src.utils import normalize_song_key
+
+
+class NegativeLyricsCache:
+    """
+    TTL-кэш неудачных запросов к Genius.
+
+    "Не найдено" живёт долго (not_found_ttl), временные ошибки и таймауты —
+    коротко (error_ttl), чтобы после сбоя песня быстро получила второй шанс.
+    """
+
+    NOT_FOUND = "not_found"
+    ERROR = "error"
+
+    def __init__(
+        self,
+        not_found_ttl: float = 24 * 3600,
+        error_ttl: float = 300,
+        max_entries: int = 100_000,
+    ):
+        self.ttls = {self.NOT_FOUND: not_found_ttl, self.ERROR: error_ttl}
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        # key -> (kind, error message, expires_at)
+        self._entries: Dict[Tuple[str, str], Tuple[str, str, float]] = {}
+
+        self.hits = {self.NOT_FOUND: 0, self.ERROR: 0}
+        self.misses = 0
+        self.recorded = {self.NOT_FOUND: 0, self.ERROR: 0}
+
+    def get(self, artist: str, song: str) -> Optional[str]:
+        """Сохранённая строка-ошибка, если песня недавно не нашлась."""
+        key = normalize_song_key(artist, song)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[2] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self.hits[entry[0]] += 1
+            return entry[1]
+
+    def record_not_found(self, artist: str, song: str, message: str) -> None:
+        self._record(self.NOT_FOUND, artist, song, message)
+
+    def record_error(self, artist: str, song: str, message: str) -> None:
+        self._record(self.ERROR, artist, song, message)
+
+    def _record(self, kind: str, artist: str, song: str, message: str) -> None:
+        ttl = self.ttls[kind]
+        if ttl <= 0:
+            return
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._purge_expired()
+                if len(self._entries) >= self.max_entries:
+                    # dict хранит порядок вставки — выкидываем самую старую запись
+                    del self._entries[next(iter(self._entries))]
+            self._entries[normalize_song_key(artist, song)] = (
+                kind,
+                message,
+                time.monotonic() + ttl,
+            )
+            self.recorded[kind] += 1
+
+    def _purge_expired(self) -> None:
+        now = time.monotonic()
+        for key in [k for k, v in self._entries.items() if v[2] <= now]:
+            del self._entries[key]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = sum(self.hits.values())
+            total = hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits_not_found": self.hits[self.NOT_FOUND],
+                "hits_error": self.hits[self.ERROR],
+                "misses": self.misses,
+                "hit_rate": round(hits / total, 3) if total else 0.0,
+                "recorded_not_found": self.recorded[self.NOT_FOUND],
+                "recorded_error": self.recorded[self.ERROR],
+            }
@@ -0,0 +1,160 @@
+# app/prefetcher.py
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from src.lyrics_api import GiniusInteractor
+from src.rate_limiter import AdaptiveRateLimiter
+from src.repo_factory import LyricsRepository
+from src.utils import normalize_song_key
+
+
+class ArtistPrefetcher:
+    """
+    Фоновая подгрузка популярных песен исполнителя в репозиторий.
+
+    После того как песню пришлось качать из Genius, исполнитель ставится в
+    очередь (не больше max_queue, лишние отбрасываются), и его top_n песен
+    скачиваются заранее — следующий запрос найдёт их в репозитории.
+    Работает в своём потоке, не чаще artists_per_minute исполнителей в минуту
+    и только пока живые запросы к Genius не стоят в очереди.
+    """
+
+    def __init__(
+        self,
+        repo: LyricsRepository,
+        interactor: GiniusInteractor,
+        top_n: int = 5,
+        max_queue: int = 100,
+        artists_per_minute: float = 6.0,
+        live_limiter: Optional[AdaptiveRateLimiter] = None,
+        on_stored: Optional[Callable[[], None]] = None,
+        recent_ttl: float = 24 * 3600,
+        max_tracked: int = 10_000,
+    ):
+        self.repo = repo
+        self.interactor = interactor
+        self.top_n = top_n
+        self.live_limiter = live_limiter
+        self.on_stored = on_stored
+        self.recent_ttl = recent_ttl
+        self.max_tracked = max_tracked
+
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._queued = set()
+        # исполнитель -> когда его уже подгружали (повторно не ставим до recent_ttl)
+        self._recent: "OrderedDict[str, float]" = OrderedDict()
+        # песни, положенные префетчем и ещё ни разу не запрошенные
+        self._prefetched: "OrderedDict[Tuple[str, str], None]" = OrderedDict()
+
+        self._budget = AdaptiveRateLimiter(
+            "prefetch", rate=artists_per_minute / 60, burst=1, max_concurrency=1
+        )
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="prefetch"
+        )
+        self._task: Optional[asyncio.Task] = None
+
+        self.scheduled = 0
+        self.dropped = 0
+        self.skipped_recent = 0
+        self.artists_fetched = 0
+        self.songs_stored = 0
+        self.songs_known = 0
+        self.hits = 0
+
+    def start(self) -> None:
+        if not self._task:
+            self._task = asyncio.create_task(self._run())
+
+    def schedule(self, artist: str) -> None:
+        key, _ = normalize_song_key(artist, "")
+        if not key or key in self._queued:
+            return
+
+        done_at = self._recent.get(key)
+        if done_at is not None and time.monotonic() - done_at < self.recent_ttl:
+            self.skipped_recent += 1
+            return
+
+        try:
+            self._queue.put_nowait(artist)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return
+        self._queued.add(key)
+        self.scheduled += 1
+
+    def record_lookup(self, artist: str, song: str) -> None:
+        """Песню нашли в репозитории; если её положил префетч — это попадание."""
+        key = normalize_song_key(artist, song)
+        if key in self._prefetched:
+            del self._prefetched[key]
+            self.hits += 1
+
+    async def _run(self) -> None:
+        while True:
+            artist = await self._queue.get()
+            key, _ = normalize_song_key(artist, "")
+            try:
+                await self._prefetch(artist)
+            except Exception as e:
+                logging.error(f"[prefetch] {artist} failed: {e}")
+            finally:
+                self._queued.discard(key)
+                self._remember(self._recent, key, time.monotonic())
+
+    async def _prefetch(self, artist: str) -> None:
+        # живые запросы важнее: ждём, пока у Genius нет очереди
+        while self.live_limiter and self.live_limiter.waiting:
+            await asyncio.sleep(1)
+
+        loop = asyncio.get_running_loop()
+        async with self._budget.slot():
+            songs = await loop.run_in_executor(
+                self._executor,
+                self.interactor.fetch_artist_top_songs,
+                artist,
+                self.top_n,
+            )
+        self.artists_fetched += 1
+
+        for title, lyrics in songs:
+            if await asyncio.to_thread(self.repo.find_lyrics, artist, title):
+                self.songs_known += 1
+                continue
+            await asyncio.to_thread(self.repo.upsert_lyrics, artist, title, lyrics)
+            self._remember(self._prefetched, normalize_song_key(artist, title), None)
+            self.songs_stored += 1
+
+        if songs and self.on_stored:
+            self.on_stored()
+
+    def _remember(self, entries: OrderedDict, key: Any, value: Any) -> None:
+        entries[key] = value
+        entries.move_to_end(key)
+        while len(entries) > self.max_tracked:
+            entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self._queue.qsize(),
+            "scheduled": self.scheduled,
+            "dropped": self.dropped,
+            "skipped_recent": self.skipped_recent,
+            "artists_fetched": self.artists_fetched,
+            "songs_stored": self.songs_stored,
+            "songs_known": self.songs_known,
+            "hits": self.hits,
+            "hit_rate": (
+                round(self.hits / self.songs_stored, 3) if self.songs_stored else 0.0
+            ),
+        }
+
+    async def aclose(self) -> None:
+        if self._task:
+            self._task.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
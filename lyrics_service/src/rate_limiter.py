@@ -0,0 +1,212 @@
+# app/rate_limiter.py
+import asyncio
+import time
+from typing import Any, Dict, Optional
+
+# исходы вызова, от которых зависит лимит
+OK = "ok"
+THROTTLED = "throttled"
+TIMEOUT = "timeout"
+ERROR = "error"
+
+
+class _Slot:
+    """Одно разрешение на вызов; исход по умолчанию — OK."""
+
+    def __init__(self, limiter: "AdaptiveRateLimiter"):
+        self._limiter = limiter
+        self.outcome = OK
+        self.retry_after: Optional[float] = None
+        self._held_by: Optional[asyncio.Future] = None
+
+    def throttled(self, retry_after: Optional[float] = None) -> None:
+        self.outcome = THROTTLED
+        self.retry_after = retry_after
+
+    def timed_out(self) -> None:
+        self.outcome = TIMEOUT
+
+    def failed(self) -> None:
+        self.outcome = ERROR
+
+    def hold_until(self, future: asyncio.Future) -> None:
+        """
+        Не освобождать слот при выходе из async with, пока не завершится future:
+        вызов в пуле потоков, брошенный по дедлайну, ещё идёт к провайдеру.
+        """
+        self._held_by = future
+
+    async def __aenter__(self) -> "_Slot":
+        await self._limiter.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> bool:
+        if exc_type is not None and self.outcome == OK:
+            if issubclass(exc_type, asyncio.CancelledError):
+                self.outcome = ERROR
+            elif issubclass(exc_type, (asyncio.TimeoutError, TimeoutError)) or (
+                "Timeout" in exc_type.__name__
+            ):
+                self.outcome = TIMEOUT
+            else:
+                self.outcome = ERROR
+        if self._held_by is not None and not self._held_by.done():
+            self._held_by.add_done_callback(
+                lambda _: self._limiter.release(self.outcome, self.retry_after)
+            )
+        else:
+            self._limiter.release(self.outcome, self.retry_after)
+        return False
+
+
+class AdaptiveRateLimiter:
+    """
+    Токен-бакет (rate запросов в секунду, burst подряд) + AIMD-лимит
+    одновременных вызовов к провайдеру.
+
+    Успех: лимит растёт на 1/limit (примерно +1 за «круг» вызовов) до
+    max_concurrency. 429 или таймаут: лимит делится пополам (не чаще раза в
+    decrease_interval, чтобы пачка одновременных 429 не обнулила его), а
+    Retry-After останавливает выдачу разрешений до указанного момента.
+
+        async with limiter.slot() as slot:
+            r = await call()
+            if r.status_code == 429:
+                slot.throttled(retry_after)
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rate: float = 0.0,
+        burst: Optional[int] = None,
+        max_concurrency: int = 10,
+        min_concurrency: int = 1,
+        decrease_factor: float = 0.5,
+        decrease_interval: float = 1.0,
+        default_backoff: float = 1.0,
+    ):
+        self.name = name
+        # rate <= 0 — без токен-бакета, только адаптивная конкурентность
+        self.rate = rate
+        self.burst = burst or max(1, int(rate) or 1)
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_concurrency = max(1, min(min_concurrency, self.max_concurrency))
+        self.decrease_factor = decrease_factor
+        self.decrease_interval = decrease_interval
+        self.default_backoff = default_backoff
+
+        self.limit = float(self.max_concurrency)
+        self._in_flight = 0
+        self._waiting = 0
+        self._cond = asyncio.Condition()
+
+        self._tokens = float(self.burst)
+        self._refilled_at = time.monotonic()
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+
+        self.acquired = 0
+        self.throttles = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.decreases = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    @property
+    def waiting(self) -> int:
+        """Сколько вызовов сейчас ждут разрешения."""
+        return self._waiting
+
+    def slot(self) -> _Slot:
+        return _Slot(self)
+
+    async def acquire(self) -> None:
+        start = time.monotonic()
+        self._waiting += 1
+        try:
+            async with self._cond:
+                await self._cond.wait_for(lambda: self._in_flight < int(self.limit))
+                self._in_flight += 1
+            try:
+                await self._wait_for_token()
+            except BaseException:
+                self._release_slot()
+                raise
+        finally:
+            self._waiting -= 1
+
+        waited = time.monotonic() - start
+        self.acquired += 1
+        self._wait_total += waited
+        self._wait_max = max(self._wait_max, waited)
+
+    async def _wait_for_token(self) -> None:
+        while True:
+            now = time.monotonic()
+            if now < self._paused_until:
+                await asyncio.sleep(self._paused_until - now)
+                continue
+            if self.rate <= 0:
+                return
+
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._refilled_at) * self.rate
+            )
+            self._refilled_at = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def release(self, outcome: str = OK, retry_after: Optional[float] = None) -> None:
+        now = time.monotonic()
+        if outcome == OK:
+            self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+        elif outcome in (THROTTLED, TIMEOUT):
+            if outcome == THROTTLED:
+                self.throttles += 1
+                self._paused_until = max(
+                    self._paused_until, now + (retry_after or self.default_backoff)
+                )
+            else:
+                self.timeouts += 1
+            if now - self._last_decrease >= self.decrease_interval:
+                self._last_decrease = now
+                self.decreases += 1
+                self.limit = max(
+                    self.min_concurrency, self.limit * self.decrease_factor
+                )
+        else:
+            # прочие ошибки ничего не говорят о нагрузке на провайдера
+            self.errors += 1
+
+        self._release_slot()
+
+    def _release_slot(self) -> None:
+        self._in_flight -= 1
+        asyncio.get_running_loop().create_task(self._notify())
+
+    async def _notify(self) -> None:
+        async with self._cond:
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": round(self.limit, 2),
+            "in_flight": self._in_flight,
+            "waiting": self._waiting,
+            "rate": self.rate,
+            "acquired": self.acquired,
+            "throttles": self.throttles,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "decreases": self.decreases,
+            "queue_wait_avg_ms": (
+                round(self._wait_total / self.acquired * 1000, 1)
+                if self.acquired
+                else 0.0
+            ),
+            "queue_wait_max_ms": round(self._wait_max * 1000, 1),
+        }
@@ -1,53 +1,221 @@
 # app/repo_csv.py
+import json
+import logging
 import os
+import threading
 import pandas as pd
-from typing import Optional
+from typing import Dict, Optional, Tuple
+
+from src.utils import normalize_song_key
 
 
 class CsvLyricsRepository:
-    def __init__(self, csv_path: str):
+    """
+    songs.csv + append-only журнал upsert'ов (<csv_path>.log, JSON lines).
+
+    upsert_lyrics пишет одну строку в журнал (fsync — вне лока) и кладёт текст
+    в словарь свежих записей; DataFrame каталога между compact() не меняется.
+    compact() в фоновом потоке собирает новый DataFrame из старого и свежих
+    записей и подменяет его целиком, поэтому find_lyrics не берёт локов и не
+    ждёт ни записи на диск, ни копирования каталога. При старте журнал
+    проигрывается в словарь свежих записей.
+    """
+
+    def __init__(self, csv_path: str, compact_every: int = 500):
         self.csv_path = csv_path
+        self.log_path = csv_path + ".log"
+        self.compact_every = compact_every
+
         try:
-            self.df = pd.read_csv(csv_path)
+            df = pd.read_csv(csv_path)
         except Exception as e:
             print(f"[repo_csv] Can't read {csv_path}: {e}")
-            self.df = pd.DataFrame(columns=["artist_name", "track_name", "lyrics"])
+            df = pd.DataFrame(columns=["artist_name", "track_name", "lyrics"])
 
-        self.df.columns = [c.strip().lower() for c in self.df.columns]
+        df.columns = [c.strip().lower() for c in df.columns]
         for col in ("artist_name", "track_name", "lyrics"):
-            if col not in self.df.columns:
-                self.df[col] = ""
-        self.df.fillna("", inplace=True)
+            if col not in df.columns:
+                df[col] = ""
+            # числовые колонки не трогаем: у дописанных строк они пустые
+            df[col] = df[col].fillna("").astype(str)
 
-    def find_lyrics(self, artist: str, song: str) -> Optional[str]:
-        if not artist or not song or self.df.empty:
-            return None
-        m = (self.df["artist_name"].str.lower() == artist.lower()) & (
-            self.df["track_name"].str.lower() == song.lower()
+        # (DataFrame, (artist, track) -> row label); подменяется одной ссылкой
+        self._base: Tuple[pd.DataFrame, Dict[Tuple[str, str], int]] = (
+            df,
+            self._build_index(df),
         )
-        res = self.df[m]
-        if res.empty:
+        # upsert'ы после последней компакции: key -> (artist, track, lyrics)
+        self._fresh: Dict[Tuple[str, str], Tuple[str, str, str]] = {}
+
+        # порядок строк в журнале и в _fresh; читатели его не берут
+        self._lock = threading.Lock()
+        self._compact_lock = threading.Lock()
+        self._pending = self._replay_log()
+
+    @staticmethod
+    def _build_index(df: pd.DataFrame) -> Dict[Tuple[str, str], int]:
+        index: Dict[Tuple[str, str], int] = {}
+        artists = df["artist_name"].astype(str).tolist()
+        tracks = df["track_name"].astype(str).tolist()
+        for label, artist, track in zip(df.index, artists, tracks):
+            # первая строка побеждает — как и у прежнего поиска по маске
+            index.setdefault(normalize_song_key(artist, track), label)
+        return index
+
+    def _replay_log(self) -> int:
+        if not os.path.exists(self.log_path):
+            return 0
+
+        replayed = 0
+        with open(self.log_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                    self._apply(rec["artist"], rec["song"], rec["lyrics"])
+                    replayed += 1
+                except (ValueError, KeyError):
+                    # недописанная последняя строка после падения — не подтверждена
+                    logging.warning(
+                        f"[repo_csv] Skipping broken log line in {self.log_path}"
+                    )
+        if replayed:
+            logging.info(f"[repo_csv] Replayed {replayed} upserts from {self.log_path}")
+        return replayed
+
+    def _apply(self, artist: str, song: str, lyrics: str) -> None:
+        self._fresh[normalize_song_key(artist, song)] = (artist, song, lyrics)
+
+    def find_lyrics(self, artist: str, song: str) -> Optional[str]:
+        if not artist or not song:
             return None
-        val = str(res.iloc[0]["lyrics"]) or ""
+        key = normalize_song_key(artist, song)
+
+        # сначала свежие записи, потом каталог: compact() подменяет _base
+        # раньше, чем убирает перенесённые в него записи из _fresh
+        fresh = self._fresh.get(key)
+        if fresh is not None:
+            val = fresh[2]
+        else:
+            df, index = self._base
+            label = index.get(key)
+            if label is None:
+                return None
+            val = str(df.at[label, "lyrics"]) or ""
         return val if val.strip() else None
 
     def upsert_lyrics(self, artist: str, song: str, lyrics: str) -> None:
         if not artist or not song or not lyrics or not lyrics.strip():
             return
 
-        m = (self.df["artist_name"].str.lower() == artist.lower()) & (
-            self.df["track_name"].str.lower() == song.lower()
+        record = json.dumps(
+            {"artist": artist, "song": song, "lyrics": lyrics}, ensure_ascii=False
         )
 
-        if self.df[m].empty:
-            self.df.loc[len(self.df)] = {
-                "artist_name": artist,
-                "track_name": song,
-                "lyrics": lyrics,
-            }
-        else:
-            idx = self.df[m].index[0]
-            self.df.at[idx, "lyrics"] = lyrics
+        dirname = os.path.dirname(self.log_path)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+        with self._lock:
+            # открываем под локом: compact() мог подменить файл журнала
+            f = open(self.log_path, "a", encoding="utf-8")
+            f.write(record + "\n")
+            f.flush()
+            self._apply(artist, song, lyrics)
+            self._pending += 1
+        try:
+            # fsync вне лока: параллельные upsert'ы и compact() его не ждут;
+            # после подмены журнала строка уже переписана в новый файл
+            os.fsync(f.fileno())
+        finally:
+            f.close()
+
+    @property
+    def needs_compaction(self) -> bool:
+        return self._pending >= self.compact_every
+
+    def compact(self) -> None:
+        """
+        Переносит свежие записи в CSV и обрезает журнал.
+
+        Под локом только снимок словаря свежих записей, подмена DataFrame и
+        обрезка журнала; записи, пришедшие во время сборки CSV, остаются в
+        журнале и в словаре.
+        """
+        if not self._compact_lock.acquire(blocking=False):
+            return  # уже идёт в другом потоке
+
+        try:
+            with self._lock:
+                fresh = dict(self._fresh)
+                log_offset = (
+                    os.path.getsize(self.log_path)
+                    if os.path.exists(self.log_path)
+                    else 0
+                )
+                compacted = self._pending
+
+            df, index = self._merge(fresh)
+
+            dirname = os.path.dirname(self.csv_path)
+            if dirname:
+                os.makedirs(dirname, exist_ok=True)
+            tmp_path = self.csv_path + ".tmp"
+            df.to_csv(tmp_path, index=False)
+            with open(tmp_path, "rb") as f:
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.csv_path)
+
+            with self._lock:
+                self._base = (df, index)
+                for key, value in fresh.items():
+                    # запись могла обновиться, пока собирался CSV
+                    if self._fresh.get(key) is value:
+                        del self._fresh[key]
+                self._truncate_log(log_offset)
+                self._pending -= compacted
+
+            logging.info(
+                f"[repo_csv] Compacted {compacted} upserts into {self.csv_path}"
+            )
+        finally:
+            self._compact_lock.release()
+
+    def _merge(
+        self, fresh: Dict[Tuple[str, str], Tuple[str, str, str]]
+    ) -> Tuple[pd.DataFrame, Dict[Tuple[str, str], int]]:
+        """Новый DataFrame и индекс: текущий каталог + свежие записи."""
+        df, index = self._base
+        df = df.copy()
+        index = dict(index)
+
+        updated_labels, updated_lyrics, new_rows = [], [], []
+        for key, (artist, song, lyrics) in fresh.items():
+            label = index.get(key)
+            if label is None:
+                index[key] = len(df) + len(new_rows)
+                new_rows.append(
+                    {"artist_name": artist, "track_name": song, "lyrics": lyrics}
+                )
+            else:
+                updated_labels.append(label)
+                updated_lyrics.append(lyrics)
+
+        if updated_labels:
+            df.loc[updated_labels, "lyrics"] = updated_lyrics
+        if new_rows:
+            df = pd.concat([df, pd.DataFrame(new_rows)], ignore_index=True)
+        return df, index
+
+    def _truncate_log(self, offset: int) -> None:
+        if not os.path.exists(self.log_path):
+            return
+
+        with open(self.log_path, "rb") as f:
+            f.seek(offset)
+            tail = f.read()
 
-        os.makedirs(os.path.dirname(self.csv_path), exist_ok=True)
-        self.df.to_csv(self.csv_path, index=False)
+        tmp_path = self.log_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(tail)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.log_path)
@@ -0,0 +1,30 @@
+# app/repo_factory.py
+import logging
+import os
+from typing import Union
+
+from src.repo_csv import CsvLyricsRepository
+from src.repo_sqlite import SqliteLyricsRepository, convert_csv_to_sqlite
+
+LyricsRepository = Union[CsvLyricsRepository, SqliteLyricsRepository]
+
+
+def create_lyrics_repository(
+    backend: str,
+    csv_path: str,
+    sqlite_path: str,
+    csv_compact_every: int = 500,
+) -> LyricsRepository:
+    """backend: "csv" (pandas в памяти) или "sqlite" (на диске)."""
+    backend = backend.strip().lower()
+
+    if backend == "csv":
+        return CsvLyricsRepository(csv_path, compact_every=csv_compact_every)
+
+    if backend == "sqlite":
+        if not os.path.exists(sqlite_path) and os.path.exists(csv_path):
+            logging.info(f"[repo] {sqlite_path} not found, converting {csv_path}")
+            convert_csv_to_sqlite(csv_path, sqlite_path)
+        return SqliteLyricsRepository(sqlite_path)
+
+    raise ValueError(f"Unknown lyrics repository backend: {backend}")
@@ -0,0 +1,135 @@
+# app/repo_sqlite.py
+import json
+import logging
+import os
+import sqlite3
+import threading
+from typing import Optional
+
+import pandas as pd
+
+from src.utils import normalize_song_key
+
+
+class SqliteLyricsRepository:
+    """
+    Тексты песен в SQLite: в памяти только соединение и страничный кэш,
+    поэтому старт и RSS не растут вместе с каталогом.
+    Интерфейс совпадает с CsvLyricsRepository.
+    """
+
+    needs_compaction = False
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        dirname = os.path.dirname(db_path)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+
+        # обращения идут и из пула потоков, поэтому одно соединение под локом
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS lyrics (
+                artist_key  TEXT NOT NULL,
+                track_key   TEXT NOT NULL,
+                artist_name TEXT NOT NULL,
+                track_name  TEXT NOT NULL,
+                lyrics      TEXT NOT NULL,
+                PRIMARY KEY (artist_key, track_key)
+            )
+            """
+        )
+        self._conn.commit()
+
+    def find_lyrics(self, artist: str, song: str) -> Optional[str]:
+        if not artist or not song:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT lyrics FROM lyrics WHERE artist_key = ? AND track_key = ?",
+                normalize_song_key(artist, song),
+            ).fetchone()
+        if not row:
+            return None
+        return row[0] if row[0].strip() else None
+
+    def upsert_lyrics(self, artist: str, song: str, lyrics: str) -> None:
+        if not artist or not song or not lyrics or not lyrics.strip():
+            return
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO lyrics (artist_key, track_key, artist_name, track_name, lyrics)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (artist_key, track_key) DO UPDATE SET lyrics = excluded.lyrics
+                """,
+                (*normalize_song_key(artist, song), artist, song, lyrics),
+            )
+            self._conn.commit()
+
+    def compact(self) -> None:
+        pass
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def convert_csv_to_sqlite(csv_path: str, db_path: str, chunksize: int = 50_000) -> int:
+    """
+    Одноразовый перенос songs.csv (и его журнала songs.csv.log) в SQLite.
+    CSV читается кусками, так что весь каталог в память не поднимается.
+    База собирается во временном файле и встаёт на место db_path только
+    целиком: после падения на полпути конвертация начнётся заново.
+    """
+    tmp_path = db_path + ".tmp"
+    for path in (tmp_path, tmp_path + "-wal", tmp_path + "-shm"):
+        # остатки прерванной конвертации
+        if os.path.exists(path):
+            os.remove(path)
+
+    repo = SqliteLyricsRepository(tmp_path)
+    total = 0
+
+    with repo._lock:
+        for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+            chunk.columns = [c.strip().lower() for c in chunk.columns]
+            for col in ("artist_name", "track_name", "lyrics"):
+                if col not in chunk.columns:
+                    chunk[col] = ""
+                chunk[col] = chunk[col].fillna("").astype(str)
+
+            rows = [
+                (*normalize_song_key(a, t), a, t, lyr)
+                for a, t, lyr in zip(
+                    chunk["artist_name"], chunk["track_name"], chunk["lyrics"]
+                )
+                if a and t
+            ]
+            # как и в CSV-репозитории, при дублях побеждает первая строка
+            repo._conn.executemany(
+                "INSERT OR IGNORE INTO lyrics VALUES (?, ?, ?, ?, ?)", rows
+            )
+            repo._conn.commit()
+            total += len(rows)
+
+    log_path = csv_path + ".log"
+    if os.path.exists(log_path):
+        with open(log_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                    repo.upsert_lyrics(rec["artist"], rec["song"], rec["lyrics"])
+                    total += 1
+                except (ValueError, KeyError):
+                    continue
+
+    # close() переносит WAL в основной файл, так что подменяется один файл
+    repo.close()
+    os.replace(tmp_path, db_path)
+    logging.info(f"[repo_sqlite] Converted {total} rows from {csv_path} into {db_path}")
+    return total
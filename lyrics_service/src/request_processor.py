@@ -1,14 +1,30 @@
 import asyncio
 import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
 
 import lyricsgenius
 import aio_pika
 
 from src.lyrics_api import GiniusInteractor
-from src.llm_groq import GroqAPIInteractor
+from src.lyrics_sources import (
+    CatalogSource,
+    GeniusSource,
+    LyricsSourceChain,
+    RepositorySource,
+)
+from src.analysis_batcher import AnalysisBatcher
+from src.analysis_cache import AnalysisCache, lyrics_hash
+from src.circuit_breaker import CircuitBreaker
+from src.llm_groq import AsyncGroqAPIInteractor
+from src.negative_cache import NegativeLyricsCache
+from src.prefetcher import ArtistPrefetcher
+from src.rate_limiter import AdaptiveRateLimiter
 from src.models import IncomingMessage, OutgoingMessage, SongText
-from src.repo_csv import CsvLyricsRepository
+from src.repo_factory import create_lyrics_repository
+from src.single_flight import SingleFlight
+from src.utils import normalize_song_key
 
 from rabbitmq.aio_client import RobustRabbitMQClient
 
@@ -29,21 +45,145 @@ class RequestProcessor:
         genius_token,
         groq_api_key,
         groq_model,
+        csv_compact_every=500,
+        repo_backend="csv",
+        sqlite_path="./data/songs.sqlite3",
+        genius_workers=4,
+        groq_base_url="https://api.groq.com/openai/v1",
+        groq_timeout=30.0,
+        groq_max_connections=10,
+        analysis_cache_path="./data/analysis_cache.sqlite3",
+        analysis_cache_max_entries=50_000,
+        genius_not_found_ttl=24 * 3600,
+        genius_error_ttl=300,
+        rabbit_max_concurrency=8,
+        rabbit_prefetch_count=None,
+        groq_batch_window_ms=0,
+        groq_batch_max_songs=30,
+        groq_lyrics_token_budget=2500,
+        genius_rate_limit=0.0,
+        groq_rate_limit=0.0,
+        prefetch_top_n=0,
+        prefetch_queue_size=100,
+        prefetch_artists_per_minute=6.0,
+        search_service_url="",
+        catalog_lookup_timeout=1.0,
+        genius_lookup_timeout=20.0,
+        breaker_failure_threshold=5,
+        breaker_recovery_timeout=30.0,
     ):
-        self.rabbitmq_client = RobustRabbitMQClient(host, port)
+        self.rabbitmq_client = RobustRabbitMQClient(
+            host,
+            port,
+            prefetch_count=rabbit_prefetch_count,
+            max_concurrency=rabbit_max_concurrency,
+        )
 
         self.requests_queue = requests_queue
         self.destination_queue = destination_queue
 
-        self.repo = CsvLyricsRepository(csv_path)
-        self.groq_interactor = GroqAPIInteractor(groq_api_key, groq_model)
-        self.genius_interactor = GiniusInteractor(genius_token)
+        self.repo = create_lyrics_repository(
+            repo_backend, csv_path, sqlite_path, csv_compact_every=csv_compact_every
+        )
+        self.analysis_cache = (
+            AnalysisCache(analysis_cache_path, max_entries=analysis_cache_max_entries)
+            if analysis_cache_path
+            else None
+        )
+        # свои лимитеры у каждого провайдера: 429 от Groq не тормозит Genius
+        self.groq_limiter = AdaptiveRateLimiter(
+            "groq", rate=groq_rate_limit, max_concurrency=groq_max_connections
+        )
+        self.genius_limiter = AdaptiveRateLimiter(
+            "genius", rate=genius_rate_limit, max_concurrency=genius_workers
+        )
+        # предохранители: лежащий провайдер не съедает таймаут каждого запроса
+        self.breakers = {
+            name: CircuitBreaker(
+                name,
+                failure_threshold=breaker_failure_threshold,
+                recovery_timeout=breaker_recovery_timeout,
+            )
+            for name in ("groq", "genius", "catalog")
+        }
+        self.groq_interactor = AsyncGroqAPIInteractor(
+            groq_api_key,
+            groq_model,
+            base_url=groq_base_url,
+            timeout=groq_timeout,
+            max_connections=groq_max_connections,
+            analysis_cache=self.analysis_cache,
+            lyrics_token_budget=groq_lyrics_token_budget,
+            limiter=self.groq_limiter,
+            breaker=self.breakers["groq"],
+        )
+        # с окном > 0 песни из соседних сообщений разбираются одним вызовом
+        self.batcher = (
+            AnalysisBatcher(
+                self.groq_interactor,
+                window_ms=groq_batch_window_ms,
+                max_songs=groq_batch_max_songs,
+            )
+            if groq_batch_window_ms > 0
+            else None
+        )
+        self.negative_cache = NegativeLyricsCache(
+            not_found_ttl=genius_not_found_ttl, error_ttl=genius_error_ttl
+        )
+        self.genius_interactor = GiniusInteractor(
+            genius_token,
+            negative_cache=self.negative_cache,
+            breaker=self.breakers["genius"],
+        )
+        self._genius_executor = ThreadPoolExecutor(
+            max_workers=genius_workers, thread_name_prefix="genius"
+        )
+
+        sources = [RepositorySource(self.repo)]
+        if search_service_url:
+            sources.append(
+                CatalogSource(
+                    search_service_url,
+                    timeout=catalog_lookup_timeout,
+                    breaker=self.breakers["catalog"],
+                )
+            )
+        sources.append(
+            GeniusSource(
+                self.genius_interactor,
+                self._genius_executor,
+                timeout=genius_lookup_timeout,
+                limiter=self.genius_limiter,
+            )
+        )
+        self.lyrics_sources = LyricsSourceChain(sources)
+
+        # 0 песен — префетч выключен
+        self.prefetcher = (
+            ArtistPrefetcher(
+                self.repo,
+                self.genius_interactor,
+                top_n=prefetch_top_n,
+                max_queue=prefetch_queue_size,
+                artists_per_minute=prefetch_artists_per_minute,
+                live_limiter=self.genius_limiter,
+                on_stored=self._maybe_compact_repo,
+            )
+            if prefetch_top_n > 0
+            else None
+        )
+
+        # склейка одновременных одинаковых запросов к Genius/репозиторию и Groq
+        self._single_flight = SingleFlight()
 
         self._process_task = None
+        self._compact_task = None
 
     def start(self):
         if not self._process_task:
-            asyncio.create_task(self.loop())
+            self._process_task = asyncio.create_task(self.loop())
+        if self.prefetcher:
+            self.prefetcher.start()
 
     async def loop(self):
         logging.info("Starting loop...")
@@ -91,31 +231,16 @@ class RequestProcessor:
             await message.nack(requeue=True)  # Requeue for retr
 
     async def process_single_request(self, msg: IncomingMessage) -> OutgoingMessage:
-        songs_for_llm = []
-
-        for credit in msg["song_credits"]:
-            artist = credit["artist"]
-            song = credit["song"]
-
-            lyrics = self.repo.find_lyrics(artist, song)
-
-            if not lyrics:
-                lyrics = self.genius_interactor.fetch_lyrics_from_api(artist, song)
-
-                # если успешно скачали — кладём в CSV
-                if lyrics and not str(lyrics).startswith("[Error fetching lyrics]"):
-                    self.repo.upsert_lyrics(artist, song, lyrics)
-
-            logging.info(
-                f"[processor] Fetched lyrics for {artist} - {song}: {lyrics}..."
-            )
-
-            songs_for_llm.append(
-                {"artist": artist, "song": song, "lyrics": lyrics or ""}
-            )
+        # все песни запроса резолвятся параллельно: задержка = самая медленная песня
+        songs_for_llm = await asyncio.gather(
+            *[
+                self._resolve_lyrics(credit["artist"], credit["song"])
+                for credit in msg["song_credits"]
+            ]
+        )
 
         # 1 LLM call for everything
-        llm_result = self.groq_interactor.analyze_songs_with_llm(songs_for_llm)
+        llm_result = await self._analyze(songs_for_llm)
 
         # возвращаем как вариант C (без lyrics)
         return {
@@ -125,6 +250,87 @@ class RequestProcessor:
             "songs_texts": llm_result["songs_texts"],
         }
 
+    async def _analyze(self, songs: List[Dict[str, str]]) -> Dict[str, Any]:
+        # одинаковые наборы песен, пришедшие одновременно, анализируются один раз
+        key = (
+            "analysis",
+            tuple(
+                (normalize_song_key(s["artist"], s["song"]), lyrics_hash(s["lyrics"]))
+                for s in songs
+            ),
+        )
+        result = await self._single_flight.do(
+            key,
+            lambda: (self.batcher or self.groq_interactor).analyze_songs_with_llm(
+                songs
+            ),
+        )
+
+        # результат мог посчитать другой запрос — возвращаем имена в нашем написании
+        songs_texts = [
+            {**t, "artist": s["artist"], "song": s["song"]}
+            for s, t in zip(songs, result["songs_texts"])
+        ]
+        return {"query": result["query"], "songs_texts": songs_texts}
+
+    async def _resolve_lyrics(self, artist: str, song: str) -> Dict[str, str]:
+        lyrics = await self._single_flight.do(
+            ("lyrics", normalize_song_key(artist, song)),
+            lambda: self._find_or_fetch_lyrics(artist, song),
+        )
+
+        logging.info(f"[processor] Fetched lyrics for {artist} - {song}: {lyrics}...")
+
+        return {"artist": artist, "song": song, "lyrics": lyrics or ""}
+
+    async def _find_or_fetch_lyrics(self, artist: str, song: str) -> Optional[str]:
+        # репозиторий -> каталог search_service -> Genius
+        lyrics, source = await self.lyrics_sources.resolve(artist, song)
+
+        # найденное вне репозитория кладём в репозиторий
+        if source and source != RepositorySource.name:
+            await asyncio.to_thread(self.repo.upsert_lyrics, artist, song, lyrics)
+            self._maybe_compact_repo()
+
+        if self.prefetcher:
+            if source == RepositorySource.name:
+                self.prefetcher.record_lookup(artist, song)
+            elif source == GeniusSource.name:
+                self.prefetcher.schedule(artist)
+
+        return lyrics
+
+    def _maybe_compact_repo(self):
+        if self._compact_task or not self.repo.needs_compaction:
+            return
+
+        async def compact():
+            try:
+                await asyncio.to_thread(self.repo.compact)
+            except Exception as e:
+                logging.error(f"[processor] Repository compaction failed: {e}")
+            finally:
+                self._compact_task = None
+
+        self._compact_task = asyncio.create_task(compact())
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {
+            "lyrics_sources": self.lyrics_sources.stats(),
+            "genius_negative_cache": self.negative_cache.stats(),
+            "single_flight": self._single_flight.stats(),
+            "genius_limiter": self.genius_limiter.stats(),
+            "groq_limiter": self.groq_limiter.stats(),
+            "breakers": {name: b.stats() for name, b in self.breakers.items()},
+        }
+        if self.analysis_cache:
+            stats["analysis_cache"] = self.analysis_cache.stats()
+        if self.batcher:
+            stats["groq_batcher"] = self.batcher.stats()
+        if self.prefetcher:
+            stats["prefetch"] = self.prefetcher.stats()
+        return stats
+
     async def forward_to_destination(self, data: OutgoingMessage) -> bool:
         """
         Forward processed data to destination queue.
@@ -146,3 +352,17 @@ class RequestProcessor:
     def stop(self):
         if self._process_task:
             self._process_task.cancel()
+        self._genius_executor.shutdown(wait=False, cancel_futures=True)
+
+    async def close(self):
+        self.stop()
+        await self.groq_interactor.aclose()
+        await self.lyrics_sources.aclose()
+        if self.prefetcher:
+            await self.prefetcher.aclose()
+        await self.rabbitmq_client.close()
+        # SQLite: close() переносит WAL в основной файл
+        if self.analysis_cache:
+            await asyncio.to_thread(self.analysis_cache.close)
+        if hasattr(self.repo, "close"):
+            await asyncio.to_thread(self.repo.close)
@@ -0,0 +1,55 @@
+# app/single_flight.py
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Склеивает одновременные одинаковые вызовы: пока по ключу идёт вызов,
+    остальные ждут его результат (или исключение) вместо повторного запроса.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        fut = self._inflight.get(key)
+        if fut is not None:
+            self.shared += 1
+            try:
+                return await asyncio.shield(fut)
+            except asyncio.CancelledError:
+                if not fut.cancelled():
+                    raise
+                # отменили ведущего, а не нас — пробуем сами
+                return await self.do(key, fn)
+
+        fut = asyncio.get_running_loop().create_future()
+        self._inflight[key] = fut
+        self.calls += 1
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            fut.cancel()
+            raise
+        except Exception as e:
+            fut.set_exception(e)
+            fut.exception()  # помечаем как полученное, если ведомых не было
+            raise
+        else:
+            fut.set_result(result)
+            return result
+        finally:
+            if self._inflight.get(key) is fut:
+                del self._inflight[key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "shared": self.shared,
+            "in_flight": len(self._inflight),
+        }
@@ -0,0 +1,10 @@
+# app/utils.py
+from typing import Tuple
+
+# так начинается строка, которую GiniusInteractor возвращает вместо текста
+LYRICS_ERROR_PREFIX = "[Error fetching lyrics]"
+
+
+def normalize_song_key(artist: str, song: str) -> Tuple[str, str]:
+    """Case- and whitespace-insensitive (artist, song) key used by all lookups."""
+    return (" ".join(artist.lower().split()), " ".join(song.lower().split()))
@@ -0,0 +1,105 @@
+# benchmark_http_client.py
+"""
+Per-message HTTP overhead: fresh httpx client per call (old) vs one shared pool.
+
+    python benchmark_http_client.py [messages]           # search_service + api.mistral.ai
+    python benchmark_http_client.py [messages] --local   # local stub server, no network
+
+Each "message" makes the same two round-trips the worker makes (search_service,
+then Mistral), but to cheap endpoints: GET /health and GET /v1/models, so no
+tokens are spent and only connection setup + RTT is measured.
+"""
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+sys.path.insert(0, os.getcwd())
+
+from src.lyrics_processor import _h2_available
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, как у настоящих серверов
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        body = b'{"status": "ok"}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub() -> str:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}"
+
+
+async def per_call(urls, headers) -> float:
+    t0 = time.perf_counter()
+    for url in urls:
+        async with httpx.AsyncClient() as client:
+            await client.get(url, headers=headers, timeout=10)
+    return time.perf_counter() - t0
+
+
+async def shared(client: httpx.AsyncClient, urls, headers) -> float:
+    t0 = time.perf_counter()
+    for url in urls:
+        await client.get(url, headers=headers, timeout=10)
+    return time.perf_counter() - t0
+
+
+def report(name: str, timings) -> None:
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1] if len(timings) >= 20 else timings[-1]
+    print(
+        f"{name:>8} | median {statistics.median(timings) * 1000:7.1f} ms | "
+        f"p95 {p95 * 1000:7.1f} ms per message"
+    )
+
+
+async def main(messages: int, local: bool) -> None:
+    if local:
+        base = start_stub()
+        urls = [f"{base}/health", f"{base}/v1/models"]
+    else:
+        search_url = os.getenv(
+            "OPENSEARCH_SERVICE_URL", "http://opensearch_service:8009"
+        )
+        urls = [f"{search_url}/health", "https://api.mistral.ai/v1/models"]
+    # без ключа Mistral ответит 401 — для замера соединения это не важно
+    headers = {"Authorization": f"Bearer {os.getenv('MISTRAL_API_KEY') or '-'}"}
+
+    old = [await per_call(urls, headers) for _ in range(messages)]
+
+    async with httpx.AsyncClient(http2=_h2_available()) as client:
+        await shared(client, urls, headers)  # прогрев: соединения открываются один раз
+        new = [await shared(client, urls, headers) for _ in range(messages)]
+
+    report("per-call", old)
+    report("shared", new)
+    saved = statistics.median(old) - statistics.median(new)
+    print(
+        f"saved {saved * 1000:.1f} ms per message "
+        f"({saved / statistics.median(old):.0%})"
+    )
+
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    asyncio.run(main(int(args[0]) if args else 50, "--local" in sys.argv))
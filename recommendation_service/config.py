@@ -9,6 +9,9 @@ class Settings(BaseSettings):
     RABBIT_PORT: int = int(os.getenv("RABBIT_PORT", 5432))
     RABBIT_USER: str = os.getenv("RABBIT_USER", "guest")
     RABBIT_PASS: str = os.getenv("RABBIT_PASS", "guest")
+    # сколько сообщений воркер обрабатывает одновременно и сколько берёт у брокера
+    RABBIT_MAX_CONCURRENCY: int = int(os.getenv("RABBIT_MAX_CONCURRENCY", 8))
+    RABBIT_PREFETCH_COUNT: int = int(os.getenv("RABBIT_PREFETCH_COUNT", 0))
 
     QUEUE_IN: str = os.getenv("QUEUE_LYRICS", "lyrics")
     QUEUE_OUT: str = os.getenv("QUEUE_RESPONSE", "response")
@@ -18,6 +21,43 @@ class Settings(BaseSettings):
         "OPENSEARCH_SERVICE_URL", "http://opensearch_service:8009"
     )
 
+    # общий пул httpx для search_service и Mistral
+    HTTP_MAX_CONNECTIONS: int = int(os.getenv("HTTP_MAX_CONNECTIONS", 20))
+    HTTP_MAX_KEEPALIVE: int = int(os.getenv("HTTP_MAX_KEEPALIVE", 20))
+    HTTP_KEEPALIVE_EXPIRY: float = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", 60))
+    HTTP2: bool = os.getenv("HTTP2", "true").lower() == "true"
+    SEARCH_TIMEOUT: float = float(os.getenv("SEARCH_TIMEOUT", 5))
+    MISTRAL_TIMEOUT: float = float(os.getenv("MISTRAL_TIMEOUT", 10))
+
+    # кэш текстов рекомендаций по набору найденных треков (TTL 0 — выключен,
+    # пустой путь — только в памяти)
+    RECOMMENDATION_CACHE_TTL: float = float(
+        os.getenv("RECOMMENDATION_CACHE_TTL", 6 * 3600)
+    )
+    RECOMMENDATION_CACHE_MAX_ENTRIES: int = int(
+        os.getenv("RECOMMENDATION_CACHE_MAX_ENTRIES", 10_000)
+    )
+    RECOMMENDATION_CACHE_PATH: str = os.getenv("RECOMMENDATION_CACHE_PATH", "")
+
+    # бюджет задержки Mistral, секунд (0 — один вызов с MISTRAL_TIMEOUT, как раньше):
+    # после квантиля MISTRAL_HEDGE_QUANTILE недавних вызовов уходит второй запрос,
+    # по дедлайну отправляется рекомендация-шаблон без LLM
+    MISTRAL_DEADLINE: float = float(os.getenv("MISTRAL_DEADLINE", 8))
+    MISTRAL_HEDGE_QUANTILE: float = float(os.getenv("MISTRAL_HEDGE_QUANTILE", 0.95))
+    MISTRAL_HEDGE_MIN_DELAY: float = float(os.getenv("MISTRAL_HEDGE_MIN_DELAY", 1.0))
+
+    # текст рекомендации уходит боту кусками по мере генерации (SSE Mistral),
+    # не чаще раза в STREAM_CHUNK_INTERVAL секунд; хедж-запросы в этом режиме не делаются
+    STREAM_RESPONSES: bool = os.getenv("STREAM_RESPONSES", "true").lower() == "true"
+    STREAM_CHUNK_INTERVAL: float = float(os.getenv("STREAM_CHUNK_INTERVAL", 1.0))
+
+    # предохранители search_service и Mistral: столько ошибок подряд -> открыт
+    # (сразу извинение / шаблон), через столько секунд — пробный запрос
+    BREAKER_FAILURE_THRESHOLD: int = int(os.getenv("BREAKER_FAILURE_THRESHOLD", 5))
+    BREAKER_RECOVERY_TIMEOUT: float = float(os.getenv("BREAKER_RECOVERY_TIMEOUT", 30))
+
+    STATS_LOG_INTERVAL: int = int(os.getenv("STATS_LOG_INTERVAL", 60))
+
     def validate(self) -> None:
         if not all(
             [self.RABBIT_HOST, self.RABBIT_PORT, self.RABBIT_USER, self.RABBIT_PASS]
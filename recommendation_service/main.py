@@ -23,14 +23,37 @@ async def start_worker():
             requests_queue=settings.QUEUE_IN,
             destination_queue=settings.QUEUE_OUT,
             opensearch_service_url=settings.OPENSEARH_SERVICE_URL,
+            rabbit_max_concurrency=settings.RABBIT_MAX_CONCURRENCY,
+            rabbit_prefetch_count=settings.RABBIT_PREFETCH_COUNT or None,
+            http_max_connections=settings.HTTP_MAX_CONNECTIONS,
+            http_max_keepalive=settings.HTTP_MAX_KEEPALIVE,
+            http_keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+            http2=settings.HTTP2,
+            search_timeout=settings.SEARCH_TIMEOUT,
+            mistral_timeout=settings.MISTRAL_TIMEOUT,
+            recommendation_cache_ttl=settings.RECOMMENDATION_CACHE_TTL,
+            recommendation_cache_max_entries=settings.RECOMMENDATION_CACHE_MAX_ENTRIES,
+            recommendation_cache_path=settings.RECOMMENDATION_CACHE_PATH,
+            mistral_deadline=settings.MISTRAL_DEADLINE,
+            mistral_hedge_quantile=settings.MISTRAL_HEDGE_QUANTILE,
+            mistral_hedge_min_delay=settings.MISTRAL_HEDGE_MIN_DELAY,
+            breaker_failure_threshold=settings.BREAKER_FAILURE_THRESHOLD,
+            breaker_recovery_timeout=settings.BREAKER_RECOVERY_TIMEOUT,
+            stream_responses=settings.STREAM_RESPONSES,
+            stream_chunk_interval=settings.STREAM_CHUNK_INTERVAL,
         )
         processor.start()
 
+        if settings.STATS_LOG_INTERVAL <= 0:
+            # статистика в лог выключена — просто работаем до остановки
+            await asyncio.Future()
+
         while True:
-            await asyncio.sleep(1)
-    except KeyboardInterrupt:
+            await asyncio.sleep(settings.STATS_LOG_INTERVAL)
+            logging.info(f"[stats] {processor.stats()}")
+    except (KeyboardInterrupt, asyncio.CancelledError):
         logging.info("Stop lyrics processing")
-        processor.stop()
+        await processor.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,111 @@
+import logging
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, TypeVar
+
+T = TypeVar("T")
+
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+
+class CircuitBreaker:
+    """
+    Предохранитель вокруг внешней зависимости.
+
+    closed: вызовы идут как обычно; failure_threshold ошибок подряд -> open.
+    open: вызовы сразу отклоняются (деградированный путь без ожидания
+    таймаута); через recovery_timeout -> half_open.
+    half_open: пропускается до half_open_max_calls пробных вызовов; удача
+    закрывает предохранитель, ошибка снова открывает его.
+
+    Вызовы идут из event loop: call() оборачивает запросы к search_service
+    и Mistral, ошибка или таймаут корутины считаются отказом.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+
+        self._lock = threading.Lock()
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+
+        self.opened = 0
+        self.rejected = 0
+
+    def allow(self) -> bool:
+        """Можно ли сейчас звать зависимость; False — сразу идти в фолбэк."""
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.recovery_timeout:
+                    self.rejected += 1
+                    return False
+                self._set_state(self.HALF_OPEN)
+                self._probes = 0
+
+            if self.state == self.HALF_OPEN:
+                # пробный вызов могли отменить, не записав исход, — не ждём его вечно
+                if time.monotonic() - self._opened_at >= 2 * self.recovery_timeout:
+                    self._opened_at = time.monotonic() - self.recovery_timeout
+                    self._probes = 0
+                if self._probes >= self.half_open_max_calls:
+                    self.rejected += 1
+                    return False
+                self._probes += 1
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            if self.state != self.CLOSED:
+                self._set_state(self.CLOSED)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or (
+                self.state == self.CLOSED and self._failures >= self.failure_threshold
+            ):
+                self._opened_at = time.monotonic()
+                self.opened += 1
+                self._set_state(self.OPEN)
+
+    async def call(self, fn: Callable[[], Awaitable[T]]) -> T:
+        """Исключение из fn — ошибка зависимости; открытый предохранитель — CircuitOpenError."""
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} circuit is open")
+        try:
+            result = await fn()
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
+
+    def _set_state(self, state: str) -> None:
+        logging.warning(f"[breaker] {self.name}: {self.state} -> {state}")
+        self.state = state
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "opened": self.opened,
+            "rejected": self.rejected,
+        }
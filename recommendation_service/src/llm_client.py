@@ -1,35 +1,277 @@
+import asyncio
+import json
 import os
 import logging
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, TypeVar
+
 import httpx
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+
+MISTRAL_CHAT_URL = "https://api.mistral.ai/v1/chat/completions"
 
-async def call_mistral(prompt: str, model: str = "mistral-small-latest") -> str:
+
+async def call_mistral(
+    prompt: str,
+    model: str = "mistral-small-latest",
+    client: Optional[httpx.AsyncClient] = None,
+    timeout: float = 10,
+) -> str:
+    """
+    client — общий пул соединений вызывающего (LyricsProcessor); без него
+    открывается разовый клиент, как раньше.
+    """
     api_key = os.getenv("MISTRAL_API_KEY")
     if not api_key:
         raise ValueError("MISTRAL_API_KEY is not set in environment variables")
 
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://api.mistral.ai/v1/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {api_key}",
-                    "Content-Type": "application/json",
-                },
-                json={
-                    "model": model,
-                    "messages": [{"role": "user", "content": prompt}],
-                    "temperature": 0.6,
-                    "max_tokens": 400,
-                },
-                timeout=10,
-            )
-            response.raise_for_status()
-            content = response.json()["choices"][0]["message"]["content"].strip()
-            return content
+        if client is None:
+            async with httpx.AsyncClient() as own_client:
+                return await _post_chat(own_client, api_key, prompt, model, timeout)
+        return await _post_chat(client, api_key, prompt, model, timeout)
 
     except Exception as e:
         logger.error(f"Ошибка вызова Mistral API: {e}")
         raise
+
+
+async def _post_chat(
+    client: httpx.AsyncClient, api_key: str, prompt: str, model: str, timeout: float
+) -> str:
+    response = await client.post(
+        MISTRAL_CHAT_URL,
+        headers=_headers(api_key),
+        json=_chat_payload(prompt, model),
+        timeout=timeout,
+    )
+    response.raise_for_status()
+    return response.json()["choices"][0]["message"]["content"].strip()
+
+
+async def stream_mistral(
+    prompt: str,
+    client: httpx.AsyncClient,
+    model: str = "mistral-small-latest",
+    timeout: float = 10,
+) -> AsyncIterator[str]:
+    """
+    Тот же запрос, что call_mistral, но с stream=true: отдаёт куски текста по
+    мере генерации (SSE). timeout — на соединение и на ожидание каждого куска.
+    """
+    api_key = os.getenv("MISTRAL_API_KEY")
+    if not api_key:
+        raise ValueError("MISTRAL_API_KEY is not set in environment variables")
+
+    async with client.stream(
+        "POST",
+        MISTRAL_CHAT_URL,
+        headers=_headers(api_key),
+        json=_chat_payload(prompt, model, stream=True),
+        timeout=timeout,
+    ) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            data = line[len("data:") :].strip()
+            if data == "[DONE]":
+                break
+            choices = json.loads(data).get("choices") or [{}]
+            delta = choices[0].get("delta", {}).get("content")
+            if delta:
+                yield delta
+
+
+def _headers(api_key: str) -> Dict[str, str]:
+    return {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json",
+    }
+
+
+def _chat_payload(prompt: str, model: str, stream: bool = False) -> Dict[str, Any]:
+    payload = {
+        "model": model,
+        "messages": [{"role": "user", "content": prompt}],
+        "temperature": 0.6,
+        "max_tokens": 400,
+    }
+    if stream:
+        payload["stream"] = True
+    return payload
+
+
+class LatencyTracker:
+    """Скользящее окно длительностей удачных вызовов LLM."""
+
+    def __init__(self, window: int = 200, default: float = 3.0, min_samples: int = 20):
+        self._samples = deque(maxlen=window)
+        self.default = default
+        self.min_samples = min_samples
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def quantile(self, q: float) -> float:
+        # пока истории мало — фиксированное значение
+        if len(self._samples) < self.min_samples:
+            return self.default
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class HedgedMistral:
+    """
+    Вызов Mistral с бюджетом задержки: если ответа нет дольше p-квантиля
+    недавних вызовов, параллельно уходит второй такой же запрос, берётся
+    первый удачный. По истечении deadline — asyncio.TimeoutError.
+
+    stream() хеджирует так же, но только до первого куска текста: второй
+    поток открывается, если первый молчит дольше p-квантиля времени до
+    первого токена, и дальше читается тот, что заговорил первым.
+    """
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        deadline: float = 8.0,
+        hedge_quantile: float = 0.95,
+        min_hedge_delay: float = 1.0,
+        model: str = "mistral-small-latest",
+    ):
+        self.client = client
+        self.deadline = deadline
+        self.hedge_quantile = hedge_quantile
+        self.min_hedge_delay = min_hedge_delay
+        self.model = model
+        # полное время ответа (call, поток целиком) и время до первого куска потока
+        self.latency = LatencyTracker()
+        self.first_token = LatencyTracker(default=1.0)
+
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.deadline_exceeded = 0
+
+    def hedge_delay(self, tracker: Optional[LatencyTracker] = None) -> float:
+        delay = (tracker or self.latency).quantile(self.hedge_quantile)
+        return min(max(delay, self.min_hedge_delay), self.deadline)
+
+    async def call(self, prompt: str) -> str:
+        self.calls += 1
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        deadline_at = started + self.deadline
+
+        async def attempt() -> str:
+            t0 = loop.time()
+            text = await call_mistral(
+                prompt, self.model, client=self.client, timeout=self.deadline
+            )
+            self.latency.record(loop.time() - t0)
+            return text
+
+        return await self._first_success(attempt, self.latency, deadline_at)
+
+    async def _first_success(
+        self,
+        attempt: Callable[[], Awaitable[T]],
+        tracker: LatencyTracker,
+        deadline_at: float,
+    ) -> T:
+        """
+        Запускает attempt, через hedge_delay(tracker) без результата — второй;
+        возвращает первый удачный, остальные отменяет.
+        """
+        loop = asyncio.get_running_loop()
+        primary = asyncio.create_task(attempt())
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.hedge_delay(tracker))
+            if not done:
+                self.hedged += 1
+                tasks.add(asyncio.create_task(attempt()))
+
+            error: Optional[BaseException] = None
+            while tasks:
+                remaining = deadline_at - loop.time()
+                if remaining <= 0:
+                    break
+                done, _ = await asyncio.wait(
+                    tasks, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    tasks.discard(task)
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+
+            if error is not None and not tasks:
+                raise error
+            self.deadline_exceeded += 1
+            raise asyncio.TimeoutError(f"Mistral did not answer in {self.deadline}s")
+        finally:
+            # у потока отмена выходит из client.stream и закрывает соединение
+            for task in tasks:
+                task.cancel()
+
+    async def stream(self, prompt: str, timeout: float = 10) -> AsyncIterator[str]:
+        """
+        Куски текста, как у stream_mistral; весь поток — в пределах deadline.
+        timeout — на соединение и на ожидание каждого куска.
+        """
+        self.calls += 1
+        loop = asyncio.get_running_loop()
+        deadline_at = loop.time() + self.deadline
+
+        async def attempt():
+            t0 = loop.time()
+            chunks = stream_mistral(prompt, self.client, self.model, timeout=timeout)
+            try:
+                first = await chunks.__anext__()
+            except StopAsyncIteration:
+                first = ""
+            self.first_token.record(loop.time() - t0)
+            return chunks, first, t0
+
+        chunks, first, started = await self._first_success(
+            attempt, self.first_token, deadline_at
+        )
+        try:
+            if first:
+                yield first
+            while True:
+                remaining = deadline_at - loop.time()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError
+                try:
+                    delta = await asyncio.wait_for(chunks.__anext__(), remaining)
+                except StopAsyncIteration:
+                    break
+                yield delta
+        except asyncio.TimeoutError:
+            # живой, но медленный поток: без общего дедлайна тянулся бы сколько угодно
+            self.deadline_exceeded += 1
+            raise asyncio.TimeoutError(
+                f"Mistral stream did not finish in {self.deadline}s"
+            )
+        finally:
+            await chunks.aclose()
+        self.latency.record(loop.time() - started)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "deadline_exceeded": self.deadline_exceeded,
+            "hedge_delay_s": round(self.hedge_delay(), 2),
+            "stream_hedge_delay_s": round(self.hedge_delay(self.first_token), 2),
+        }
@@ -1,14 +1,20 @@
 import asyncio
 import json
 import logging
-from typing import Any
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
 
 import aio_pika
 import httpx
 
 from src.models import IncomingMessage, OutgoingMessage, ResponseTrack, SongText
-from src.prompt_builder import build_recommendation_prompt
-from src.llm_client import call_mistral
+from src.prompt_builder import (
+    build_recommendation_prompt,
+    render_template_recommendation,
+)
+from src.circuit_breaker import CircuitBreaker, CircuitOpenError
+from src.llm_client import HedgedMistral, call_mistral, stream_mistral
+from src.recommendation_cache import RecommendationCache, results_key
 
 from rabbitmq.aio_client import RobustRabbitMQClient
 
@@ -20,20 +26,103 @@ logging.basicConfig(
 
 class LyricsProcessor:
     def __init__(
-        self, host, port, requests_queue, destination_queue, opensearch_service_url
+        self,
+        host,
+        port,
+        requests_queue,
+        destination_queue,
+        opensearch_service_url,
+        rabbit_max_concurrency=1,
+        rabbit_prefetch_count=None,
+        http_max_connections=20,
+        http_max_keepalive=20,
+        http_keepalive_expiry=60.0,
+        http2=True,
+        search_timeout=5.0,
+        mistral_timeout=10.0,
+        recommendation_cache_ttl=6 * 3600,
+        recommendation_cache_max_entries=10_000,
+        recommendation_cache_path="",
+        mistral_deadline=8.0,
+        mistral_hedge_quantile=0.95,
+        mistral_hedge_min_delay=1.0,
+        breaker_failure_threshold=5,
+        breaker_recovery_timeout=30.0,
+        stream_responses=False,
+        stream_chunk_interval=1.0,
     ):
-        self.rabbitmq_client = RobustRabbitMQClient(host, port)
+        self.rabbitmq_client = RobustRabbitMQClient(
+            host,
+            port,
+            prefetch_count=rabbit_prefetch_count,
+            max_concurrency=rabbit_max_concurrency,
+        )
 
         self.requests_queue = requests_queue
         self.destination_queue = destination_queue
 
         self.opensearch_service_url = opensearch_service_url
+        self.search_timeout = search_timeout
+        self.mistral_timeout = mistral_timeout
+
+        # один пул соединений на воркер для search_service и Mistral: TCP/TLS
+        # поднимаются один раз, а не на каждое сообщение
+        self.http_client = httpx.AsyncClient(
+            http2=http2 and _h2_available(),
+            limits=httpx.Limits(
+                max_connections=http_max_connections,
+                max_keepalive_connections=http_max_keepalive,
+                keepalive_expiry=http_keepalive_expiry,
+            ),
+        )
+
+        # бюджет задержки LLM: хедж-запрос после p-квантиля, по дедлайну — шаблон
+        self.hedged_mistral = (
+            HedgedMistral(
+                self.http_client,
+                deadline=mistral_deadline,
+                hedge_quantile=mistral_hedge_quantile,
+                min_hedge_delay=mistral_hedge_min_delay,
+            )
+            if mistral_deadline > 0
+            else None
+        )
+        self.template_fallbacks = 0
+
+        # текст Mistral уходит в очередь ответов по мере генерации, не чаще
+        # раза в stream_chunk_interval секунд
+        self.stream_responses = stream_responses
+        self.stream_chunk_interval = stream_chunk_interval
+        self.partials_published = 0
+
+        # лежащий search_service или Mistral не съедает таймаут каждого сообщения
+        self.search_breaker = CircuitBreaker(
+            "search_service",
+            failure_threshold=breaker_failure_threshold,
+            recovery_timeout=breaker_recovery_timeout,
+        )
+        self.mistral_breaker = CircuitBreaker(
+            "mistral",
+            failure_threshold=breaker_failure_threshold,
+            recovery_timeout=breaker_recovery_timeout,
+        )
+
+        # одинаковая выдача search_service -> тот же промпт -> текст из кэша
+        self.recommendation_cache = (
+            RecommendationCache(
+                ttl=recommendation_cache_ttl,
+                max_entries=recommendation_cache_max_entries,
+                db_path=recommendation_cache_path,
+            )
+            if recommendation_cache_ttl > 0
+            else None
+        )
 
         self._process_task = None
 
     def start(self):
         if not self._process_task:
-            asyncio.create_task(self.loop())
+            self._process_task = asyncio.create_task(self.loop())
 
     async def loop(self):
         logging.info("Starting loop...")
@@ -90,24 +179,34 @@ class LyricsProcessor:
         fallback_response = (
             "К сожалению, не удалось сгенерировать персонализированную рекомендацию."
         )
+
+        # промежуточные сообщения несут весь текст на момент отправки и номер
+        # seq: бот правит одно сообщение и не откатывает его к старому куску
+        seq = 0
+
+        async def publish_partial(text: str) -> None:
+            nonlocal seq
+            seq += 1
+            partial: OutgoingMessage = {
+                "id": msg["id"],
+                "user_id": msg["user_id"],
+                "response": text,
+                "partial": True,
+                "seq": seq,
+            }
+            if await self.forward_to_destination(partial):
+                self.partials_published += 1
+
         try:
-            async with httpx.AsyncClient() as client:
-                url = self.opensearch_service_url + "/search"
-
-                post_response = await client.post(
-                    url,
-                    timeout=5,  # Set appropriate timeout
-                    json={
-                        "query": request,
-                        "size": 5,
-                    },
-                )
-                post_response.raise_for_status()
-                parsed_response = post_response.json()
-                print(f"{parsed_response=}")
-
-                prompt = build_recommendation_prompt(parsed_response["results"])
-                recommendation = await call_mistral(prompt)
+            parsed_response = await self.search_breaker.call(
+                lambda: self._search(request)
+            )
+            print(f"{parsed_response=}")
+
+            recommendation = await self._recommend(
+                parsed_response["results"],
+                publish_partial if self.stream_responses else None,
+            )
         except Exception as e:
             import traceback
 
@@ -123,8 +222,119 @@ class LyricsProcessor:
             "id": msg["id"],
             "user_id": msg["user_id"],
             "response": recommendation,
+            "partial": False,
+            "seq": seq + 1,
         }
 
+    async def _search(self, request: str) -> dict:
+        url = self.opensearch_service_url + "/search"
+
+        post_response = await self.http_client.post(
+            url,
+            timeout=self.search_timeout,
+            json={
+                "query": request,
+                "size": 5,
+            },
+        )
+        post_response.raise_for_status()
+        return post_response.json()
+
+    async def _recommend(
+        self,
+        results: list,
+        on_partial: Optional[Callable[[str], Awaitable[None]]] = None,
+    ) -> str:
+        key = results_key(results)
+        if self.recommendation_cache:
+            cached = await asyncio.to_thread(self.recommendation_cache.get, key)
+            if cached is not None:
+                return cached
+
+        prompt = build_recommendation_prompt(results)
+        started = time.perf_counter()
+        try:
+            recommendation = await self.mistral_breaker.call(
+                lambda: self._call_llm(prompt, on_partial)
+            )
+        except Exception as e:
+            if not (self.hedged_mistral or isinstance(e, CircuitOpenError)):
+                raise
+            # выдача уже есть — лучше список треков без LLM, чем извинение
+            logging.warning(f"Mistral unavailable, using template: {e}")
+            self.template_fallbacks += 1
+            return render_template_recommendation(results)
+        if self.recommendation_cache:
+            await asyncio.to_thread(
+                self.recommendation_cache.put,
+                key,
+                recommendation,
+                time.perf_counter() - started,
+            )
+        return recommendation
+
+    async def _call_llm(
+        self,
+        prompt: str,
+        on_partial: Optional[Callable[[str], Awaitable[None]]] = None,
+    ) -> str:
+        # поток хеджируется только до первого куска: дальше читается один поток,
+        # и уже показанный текст ничто не перебьёт
+        if on_partial:
+            return await self._stream_llm(prompt, on_partial)
+        if self.hedged_mistral:
+            return await self.hedged_mistral.call(prompt)
+        return await call_mistral(
+            prompt, client=self.http_client, timeout=self.mistral_timeout
+        )
+
+    async def _stream_llm(
+        self, prompt: str, on_partial: Callable[[str], Awaitable[None]]
+    ) -> str:
+        # пустой кусок — бот сразу показывает заглушку, пока идёт генерация
+        await on_partial("")
+
+        # с MISTRAL_DEADLINE поток хеджируется до первого куска и целиком
+        # ограничен дедлайном; по истечении _recommend отвечает шаблоном
+        if self.hedged_mistral:
+            chunks = self.hedged_mistral.stream(prompt, timeout=self.mistral_timeout)
+        else:
+            chunks = stream_mistral(
+                prompt, self.http_client, timeout=self.mistral_timeout
+            )
+
+        loop = asyncio.get_running_loop()
+        text = ""
+        last_sent = float("-inf")
+        try:
+            async for delta in chunks:
+                text += delta
+                # первый кусок — сразу, дальше не чаще stream_chunk_interval
+                if loop.time() - last_sent >= self.stream_chunk_interval:
+                    last_sent = loop.time()
+                    await on_partial(text.strip())
+        finally:
+            # ошибка публикации — закрываем соединение сразу, не ждём сборщика
+            await chunks.aclose()
+        return text.strip()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {
+            "mistral": {
+                "template_fallbacks": self.template_fallbacks,
+                "partials_published": self.partials_published,
+            },
+            "breakers": {
+                "search_service": self.search_breaker.stats(),
+                "mistral": self.mistral_breaker.stats(),
+            },
+        }
+        if self.hedged_mistral:
+            stats["mistral"].update(self.hedged_mistral.stats())
+        if self.recommendation_cache:
+            stats["recommendation_cache"] = self.recommendation_cache.stats()
+        return stats
+
     def process_single_track(self, text: SongText):
         return f"{text['artist']}:{text['song']}"
 
@@ -153,6 +363,23 @@ class LyricsProcessor:
         if self._process_task:
             self._process_task.cancel()
 
+    async def close(self):
+        self.stop()
+        await self.http_client.aclose()
+        await self.rabbitmq_client.close()
+        if self.recommendation_cache:
+            self.recommendation_cache.close()
+
+
+def _h2_available() -> bool:
+    # HTTP/2 нужен пакет h2 (httpx[http2]); без него работаем по HTTP/1.1
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        logging.warning("h2 is not installed, falling back to HTTP/1.1")
+        return False
+    return True
+
 
 # eminem - Lose Yourself
 # eminem - Stan
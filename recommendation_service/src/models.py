@@ -19,6 +19,9 @@ class OutgoingMessage(TypedDict):
     id: str
     user_id: str
     response: str
+    # partial=True — промежуточный текст потока; seq растёт с каждым сообщением
+    partial: bool
+    seq: int
 
 
 class ResponseTrack(TypedDict):
@@ -42,3 +42,30 @@ def build_recommendation_prompt(songs_texts: List[dict]) -> str:
     Ответ должен содержать только текст рекомендации, без пояснений."""
 
     return prompt
+
+
+def render_template_recommendation(songs_texts: List[dict]) -> str:
+    """
+    Рекомендация без LLM — из тех же результатов поиска. Отдаётся, когда
+    Mistral не уложился в бюджет задержки.
+    """
+    top_genre, decade, _ = extract_aggregates(songs_texts)
+    # темы без повторов: в шаблоне их видит пользователь, а не LLM
+    top_themes = ", ".join(
+        dict.fromkeys(s["topic"] for s in songs_texts if s.get("topic"))
+    )
+
+    lines = [
+        f"Похоже, вам нравится {top_genre} музыка"
+        + (f" про {top_themes}" if top_themes else "")
+        + f". Вот что стоит послушать из {decade}:"
+    ]
+    for i, s in enumerate(songs_texts[:5], start=1):
+        details = ", ".join(
+            str(v) for v in (s.get("genre"), s.get("release_date")) if v
+        )
+        lines.append(
+            f"{i}) {s['artist_name']} — {s['track_name']}"
+            + (f" ({details})" if details else "")
+        )
+    return "\n".join(lines)
@@ -0,0 +1,127 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def results_key(results: List[dict]) -> Tuple[str, ...]:
+    """Упорядоченные id треков выдачи — от них полностью зависит промпт."""
+    return tuple(
+        str(r.get("track_id") or f"{r.get('artist_name')}|{r.get('track_name')}")
+        for r in results
+    )
+
+
+class RecommendationCache:
+    """
+    LRU-кэш готовых текстов рекомендаций с TTL.
+
+    Ключ — упорядоченные id треков из выдачи search_service. Вместе с текстом
+    хранится, сколько длился вызов LLM, — так считается сэкономленное время.
+    С db_path записи дублируются в SQLite и переживают перезапуск воркера.
+    """
+
+    def __init__(
+        self, ttl: float = 6 * 3600, max_entries: int = 10_000, db_path: str = ""
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        # key -> (text, llm_seconds, expires_at)
+        self._entries: "OrderedDict[Tuple[str, ...], Tuple[str, float, float]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.saved_llm_seconds = 0.0
+
+        self._conn = None
+        if db_path:
+            dirname = os.path.dirname(db_path)
+            if dirname:
+                os.makedirs(dirname, exist_ok=True)
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS recommendations (
+                    track_ids   TEXT PRIMARY KEY,
+                    text        TEXT NOT NULL,
+                    llm_seconds REAL NOT NULL,
+                    expires_at  REAL NOT NULL
+                )
+                """
+            )
+            self._conn.commit()
+            self._load()
+
+    def _load(self) -> None:
+        now = time.time()
+        self._conn.execute("DELETE FROM recommendations WHERE expires_at <= ?", (now,))
+        self._conn.commit()
+        rows = self._conn.execute(
+            "SELECT track_ids, text, llm_seconds, expires_at FROM recommendations "
+            "ORDER BY expires_at DESC LIMIT ?",
+            (self.max_entries,),
+        ).fetchall()
+        for track_ids, text, llm_seconds, expires_at in reversed(rows):
+            self._entries[tuple(json.loads(track_ids))] = (
+                text,
+                llm_seconds,
+                expires_at,
+            )
+
+    def get(self, key: Tuple[str, ...]) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[2] <= time.time():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.saved_llm_seconds += entry[1]
+            return entry[0]
+
+    def put(self, key: Tuple[str, ...], text: str, llm_seconds: float) -> None:
+        if not key or self.ttl <= 0:
+            return
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._entries[key] = (text, llm_seconds, expires_at)
+            self._entries.move_to_end(key)
+            evicted = []
+            while len(self._entries) > self.max_entries:
+                evicted.append(self._entries.popitem(last=False)[0])
+
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO recommendations VALUES (?, ?, ?, ?)",
+                    (json.dumps(key), text, llm_seconds, expires_at),
+                )
+                self._conn.executemany(
+                    "DELETE FROM recommendations WHERE track_ids = ?",
+                    [(json.dumps(k),) for k in evicted],
+                )
+                self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "saved_llm_seconds": round(self.saved_llm_seconds, 1),
+        }
+
+    def close(self) -> None:
+        if self._conn is not None:
+            with self._lock:
+                self._conn.close()
@@ -1,6 +1,25 @@
 """Pydantic модели для запросов и ответов."""
-from typing import List, Optional, Dict, Any
-from pydantic import BaseModel, Field
+from typing import List, Literal, Optional, Dict, Any
+from pydantic import BaseModel, Field, field_validator
+
+# поля TrackResult, которые можно запросить через fields
+TRACK_FIELDS = [
+    "track_id",
+    "artist_name",
+    "track_name",
+    "genre",
+    "release_date",
+    "topic",
+    "lyrics",
+    "summary",
+    "keywords",
+    "danceability",
+    "energy",
+    "valence",
+    "acousticness",
+    "instrumentalness",
+    "loudness",
+]
 
 
 class TrackResult(BaseModel):
@@ -13,6 +32,11 @@ class TrackResult(BaseModel):
     release_date: Optional[int] = None
     topic: Optional[str] = None
     lyrics: Optional[str] = None
+    lyrics_snippet: Optional[str] = Field(
+        None, description="Фрагмент текста с подсветкой совпадений (<em>)"
+    )
+    summary: Optional[str] = Field(None, description="Краткий разбор текста (LLM)")
+    keywords: Optional[List[str]] = None
     score: float = Field(..., description="Релевантность результата")
     danceability: Optional[float] = None
     energy: Optional[float] = None
@@ -43,11 +67,49 @@ class SearchRequest(BaseModel):
     query: str = Field(..., description="Поисковый запрос", min_length=1)
     size: int = Field(10, ge=1, le=100, description="Количество результатов")
     search_fields: Optional[List[str]] = Field(
-        None, description="Поля для поиска (artist_name, track_name, lyrics)"
+        None,
+        description="Поля для поиска (artist_name, track_name, lyrics, summary)",
     )
     filters: Optional[Dict[str, Any]] = Field(
         None, description="Фильтры (genre, topic, release_date и т.д.)"
     )
+    include_lyrics: bool = Field(
+        False, description="Возвращать полный текст песен (большой объём ответа)"
+    )
+    fields: Optional[List[str]] = Field(
+        None,
+        description="Возвращать только эти поля трека "
+        "(track_id, artist_name, track_name и score — всегда)",
+    )
+    lyrics_snippet: bool = Field(
+        False, description="Добавить фрагмент текста с подсветкой совпадений"
+    )
+    profile: Optional[Literal["fast", "balanced", "thorough"]] = Field(
+        None,
+        description="Профиль запроса: fast — точные слова, balanced — ngram и "
+        "опечатки, thorough — всё сразу (по умолчанию SEARCH_PROFILE)",
+    )
+    timeout_ms: Optional[int] = Field(
+        None,
+        ge=0,
+        description="Бюджет времени, мс (по умолчанию — из профиля, 0 — без бюджета)",
+    )
+    terminate_after: Optional[int] = Field(
+        None,
+        ge=0,
+        description="Сколько документов собрать на шард "
+        "(по умолчанию — из профиля, 0 — без ограничения)",
+    )
+
+    @field_validator("fields")
+    @classmethod
+    def check_fields(cls, value: Optional[List[str]]) -> Optional[List[str]]:
+        """Проверяет, что запрошены существующие поля трека."""
+        if value is not None:
+            unknown = [f for f in value if f not in TRACK_FIELDS]
+            if unknown:
+                raise ValueError(f"Неизвестные поля: {', '.join(unknown)}")
+        return value
 
     class Config:
         json_schema_extra = {
@@ -56,6 +118,8 @@ class SearchRequest(BaseModel):
                 "size": 10,
                 "search_fields": ["artist_name", "track_name", "lyrics"],
                 "filters": {"genre": "pop", "release_date": {"gte": 2000}},
+                "fields": ["genre", "release_date", "topic"],
+                "lyrics_snippet": True,
             }
         }
 
@@ -67,10 +131,75 @@ class SearchResponse(BaseModel):
     results: List[TrackResult] = Field(..., description="Список результатов")
     query: str = Field(..., description="Исходный запрос")
     took: Optional[int] = Field(None, description="Время выполнения запроса в мс")
+    profile: Optional[str] = Field(None, description="Профиль запроса")
+    timed_out: bool = Field(
+        False, description="Сработал timeout — результаты частичные"
+    )
+    terminated_early: Optional[bool] = Field(
+        None, description="Сработал terminate_after — результаты частичные"
+    )
 
     class Config:
         json_schema_extra = {
-            "example": {"total": 150, "results": [], "query": "love", "took": 25}
+            "example": {
+                "total": 150,
+                "results": [],
+                "query": "love",
+                "took": 25,
+                "profile": "thorough",
+                "timed_out": False,
+            }
+        }
+
+
+class BatchSearchRequest(BaseModel):
+    """Несколько поисковых запросов, выполняемых одним _msearch."""
+
+    searches: List[SearchRequest] = Field(
+        ..., min_length=1, description="Поисковые запросы"
+    )
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "searches": [
+                    {"query": "love", "size": 5},
+                    {"query": "summer party", "size": 5, "filters": {"genre": "pop"}},
+                ]
+            }
+        }
+
+
+class BatchSearchItem(BaseModel):
+    """Результат одного запроса из пакета: ответ или ошибка."""
+
+    response: Optional[SearchResponse] = None
+    error: Optional[str] = Field(None, description="Ошибка выполнения этого запроса")
+
+
+class BatchSearchResponse(BaseModel):
+    """Ответ на пакетный поиск — в порядке запросов."""
+
+    results: List[BatchSearchItem]
+    took: Optional[int] = Field(None, description="Время выполнения пакета в мс")
+
+
+class LyricsLookupResponse(BaseModel):
+    """Текст песни, найденной по точному совпадению исполнителя и названия."""
+
+    track_id: str
+    artist_name: str
+    track_name: str
+    lyrics: str
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "track_id": "76048",
+                "artist_name": "radiohead",
+                "track_name": "vegetable",
+                "lyrics": "want work hard try hard ...",
+            }
         }
 
 
@@ -81,3 +210,6 @@ class HealthResponse(BaseModel):
     index_name: str
     index_exists: bool
     document_count: Optional[int] = None
+    search_cache: Optional[Dict[str, Any]] = Field(
+        None, description="Статистика кэша поиска (None — кэш выключен)"
+    )
@@ -2,6 +2,7 @@
 from fastapi import APIRouter
 from app.models.schemas import HealthResponse
 from app.services.opensearch_service import opensearch_service
+from app.services.search_service import search_service
 from config import settings
 
 router = APIRouter(prefix="/health", tags=["health"])
@@ -12,8 +13,10 @@ async def health_check() -> HealthResponse:
     """
     Проверяет состояние сервиса и подключение к OpenSearch.
     """
-    index_exists = opensearch_service.index_exists()
-    document_count = opensearch_service.get_document_count() if index_exists else None
+    index_exists = await opensearch_service.index_exists()
+    document_count = (
+        await opensearch_service.get_document_count() if index_exists else None
+    )
 
     status = "healthy" if index_exists else "unhealthy"
 
@@ -22,4 +25,5 @@ async def health_check() -> HealthResponse:
         index_name=settings.INDEX_NAME,
         index_exists=index_exists,
         document_count=document_count,
+        search_cache=search_service.cache.stats() if search_service.cache else None,
     )
@@ -1,15 +1,29 @@
 """Роутер для поиска."""
 from fastapi import APIRouter, HTTPException, Query
-from typing import Optional, List, Dict, Any
+from typing import Literal, Optional, List, Dict, Any
 
-from app.models.schemas import SearchRequest, SearchResponse, TrackResult
+from app.models.schemas import (
+    TRACK_FIELDS,
+    BatchSearchRequest,
+    BatchSearchResponse,
+    SearchRequest,
+    SearchResponse,
+    TrackResult,
+    LyricsLookupResponse,
+)
 from app.services.search_service import search_service
 from app.services.opensearch_service import opensearch_service
+from config import settings
 
 router = APIRouter(prefix="/search", tags=["search"])
 
 
-@router.post("", response_model=SearchResponse, summary="Поиск по музыкальному индексу")
+@router.post(
+    "",
+    response_model=SearchResponse,
+    response_model_exclude_unset=True,
+    summary="Поиск по музыкальному индексу",
+)
 async def search(request: SearchRequest) -> SearchResponse:
     """
     Выполняет поиск по музыкальному индексу.
@@ -18,19 +32,58 @@ async def search(request: SearchRequest) -> SearchResponse:
     - Текстовый поиск по артистам, названиям треков и текстам песен
     - Фильтрацию по жанру, теме, году выпуска и другим параметрам
     - Ngram поиск для частичных совпадений
+    - Выбор возвращаемых полей (fields); полный текст песен — только с
+      include_lyrics, фрагмент с подсветкой — lyrics_snippet
     """
     try:
-        return search_service.search(
+        return await search_service.search(
             query=request.query,
             size=request.size,
             search_fields=request.search_fields,
             filters=request.filters,
+            include_lyrics=request.include_lyrics,
+            fields=request.fields,
+            lyrics_snippet=request.lyrics_snippet,
+            profile=request.profile,
+            timeout_ms=request.timeout_ms,
+            terminate_after=request.terminate_after,
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Ошибка поиска: {str(e)}")
 
 
-@router.get("", response_model=SearchResponse, summary="Поиск через GET запрос")
+@router.post(
+    "/batch",
+    response_model=BatchSearchResponse,
+    response_model_exclude_unset=True,
+    summary="Несколько поисков одним запросом",
+)
+async def search_batch(request: BatchSearchRequest) -> BatchSearchResponse:
+    """
+    Выполняет несколько поисков одним обращением к OpenSearch (_msearch).
+
+    Результаты возвращаются в порядке запросов; ошибка одного запроса
+    попадает в его поле error и не влияет на остальные. Размер пакета
+    ограничен SEARCH_BATCH_MAX_SIZE.
+    """
+    if len(request.searches) > settings.SEARCH_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Не больше {settings.SEARCH_BATCH_MAX_SIZE} запросов в пакете",
+        )
+
+    try:
+        return await search_service.search_batch(request.searches)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Ошибка поиска: {str(e)}")
+
+
+@router.get(
+    "",
+    response_model=SearchResponse,
+    response_model_exclude_unset=True,
+    summary="Поиск через GET запрос",
+)
 async def search_get(
     q: str = Query(..., description="Поисковый запрос", min_length=1),
     size: int = Query(10, ge=1, le=100, description="Количество результатов"),
@@ -38,10 +91,37 @@ async def search_get(
     topic: Optional[str] = Query(None, description="Фильтр по теме"),
     year_from: Optional[int] = Query(None, description="Год выпуска от"),
     year_to: Optional[int] = Query(None, description="Год выпуска до"),
+    include_lyrics: bool = Query(False, description="Возвращать полный текст песен"),
+    fields: Optional[str] = Query(
+        None, description="Возвращаемые поля трека через запятую"
+    ),
+    lyrics_snippet: bool = Query(
+        False, description="Фрагмент текста с подсветкой совпадений"
+    ),
+    profile: Optional[Literal["fast", "balanced", "thorough"]] = Query(
+        None, description="Профиль запроса (по умолчанию SEARCH_PROFILE)"
+    ),
+    timeout_ms: Optional[int] = Query(
+        None, ge=0, description="Бюджет времени, мс (0 — без бюджета)"
+    ),
+    terminate_after: Optional[int] = Query(
+        None,
+        ge=0,
+        description="Сколько документов собрать на шард (0 — без ограничения)",
+    ),
 ) -> SearchResponse:
     """
     Выполняет поиск через GET запрос (удобно для тестирования).
     """
+    selected_fields = None
+    if fields:
+        selected_fields = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = [f for f in selected_fields if f not in TRACK_FIELDS]
+        if unknown:
+            raise HTTPException(
+                status_code=422, detail=f"Неизвестные поля: {', '.join(unknown)}"
+            )
+
     filters = {}
     if genre:
         filters["genre"] = genre
@@ -56,15 +136,45 @@ async def search_get(
         filters["release_date"] = release_date_filter
 
     try:
-        return search_service.search(
+        return await search_service.search(
             query=q,
             size=size,
             filters=filters if filters else None,
+            include_lyrics=include_lyrics,
+            fields=selected_fields,
+            lyrics_snippet=lyrics_snippet,
+            profile=profile,
+            timeout_ms=timeout_ms,
+            terminate_after=terminate_after,
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Ошибка поиска: {str(e)}")
 
 
+@router.get(
+    "/lyrics",
+    response_model=LyricsLookupResponse,
+    summary="Текст песни по исполнителю и названию",
+)
+async def get_lyrics(
+    artist: str = Query(..., description="Исполнитель", min_length=1),
+    track: str = Query(..., description="Название трека", min_length=1),
+) -> LyricsLookupResponse:
+    """
+    Быстрый точный поиск текста песни (без учёта регистра), без полнотекстового скоринга.
+    Используется lyrics_service до обращения к Genius.
+    """
+    try:
+        lyrics = await search_service.find_lyrics(artist, track)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Ошибка поиска: {str(e)}")
+    if not lyrics:
+        raise HTTPException(
+            status_code=404, detail=f"Текст для {artist} - {track} не найден"
+        )
+    return lyrics
+
+
 @router.get(
     "/track/{track_id}", response_model=TrackResult, summary="Получить трек по ID"
 )
@@ -72,7 +182,7 @@ async def get_track(track_id: str) -> TrackResult:
     """
     Получает информацию о треке по его ID.
     """
-    track = search_service.get_track(track_id)
+    track = await search_service.get_track(track_id)
     if not track:
         raise HTTPException(status_code=404, detail=f"Трек с ID {track_id} не найден")
     return track
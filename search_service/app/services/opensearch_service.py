@@ -1,10 +1,25 @@
 """Сервис для работы с OpenSearch."""
-from typing import Dict, Any, Optional
-from opensearchpy import OpenSearch, RequestsHttpConnection
-from requests.auth import HTTPBasicAuth
+from typing import Dict, Any, List, Optional
+from opensearchpy import AsyncOpenSearch, AIOHttpConnection
 
+from app.models.schemas import TRACK_FIELDS
 from config import settings
 
+# без этих полей TrackResult не собрать
+REQUIRED_FIELDS = ["track_id", "artist_name", "track_name"]
+
+# профили запроса: чем дешевле, тем меньше полнота. Бюджеты по умолчанию —
+# timeout (мс) и terminate_after (документов на шард); при их срабатывании
+# OpenSearch возвращает частичный результат
+QUERY_PROFILES = {
+    # точные совпадения по словам: исполнитель/название, без опечаток
+    "fast": {"timeout_ms": 300, "terminate_after": 10_000},
+    # частичные слова (ngram) и опечатки, но один multi_match
+    "balanced": {"timeout_ms": 1000, "terminate_after": None},
+    # всё сразу: fuzzy multi_match по ngram и отдельный match на каждое поле
+    "thorough": {"timeout_ms": None, "terminate_after": None},
+}
+
 
 class OpenSearchService:
     """Сервис для работы с OpenSearch."""
@@ -14,44 +29,82 @@ class OpenSearchService:
         self.client = self._create_client()
         self.index_name = settings.INDEX_NAME
 
-    def _create_client(self) -> OpenSearch:
-        """Создаёт клиент OpenSearch."""
-        auth = HTTPBasicAuth(
-            settings.OPENSEARCH_USER, settings.OPENSEARCH_INITIAL_ADMIN_PASSWORD
-        )
-        client = OpenSearch(
+    def _create_client(self) -> AsyncOpenSearch:
+        """
+        Создаёт асинхронный клиент OpenSearch.
+
+        Запросы не блокируют event loop uvicorn: пока один поиск ждёт
+        OpenSearch, обрабатываются другие. Соединения берутся из пула
+        aiohttp размером OPENSEARCH_POOL_MAXSIZE.
+        """
+        client = AsyncOpenSearch(
             hosts=[settings.OPENSEARCH_URL],
             http_compress=True,
-            http_auth=auth,
+            http_auth=(
+                settings.OPENSEARCH_USER,
+                settings.OPENSEARCH_INITIAL_ADMIN_PASSWORD,
+            ),
             use_ssl=settings.OPENSEARCH_URL.startswith("https://"),
             verify_certs=False,
-            connection_class=RequestsHttpConnection,
-            timeout=60,
-            max_retries=3,
+            ssl_show_warn=False,
+            connection_class=AIOHttpConnection,
+            maxsize=settings.OPENSEARCH_POOL_MAXSIZE,
+            timeout=settings.OPENSEARCH_TIMEOUT,
+            max_retries=settings.OPENSEARCH_MAX_RETRIES,
             retry_on_timeout=True,
         )
         return client
 
-    def index_exists(self) -> bool:
+    async def close(self) -> None:
+        """Закрывает пул соединений клиента."""
+        await self.client.close()
+
+    async def index_exists(self) -> bool:
         """Проверяет существование индекса."""
-        return self.client.indices.exists(index=self.index_name)
+        return await self.client.indices.exists(
+            index=self.index_name, request_timeout=settings.SEARCH_REQUEST_TIMEOUT
+        )
 
-    def get_document_count(self) -> Optional[int]:
+    async def get_document_count(self) -> Optional[int]:
         """Получает количество документов в индексе."""
         try:
-            if not self.index_exists():
+            if not await self.index_exists():
                 return None
-            response = self.client.count(index=self.index_name)
+            response = await self.client.count(
+                index=self.index_name,
+                request_timeout=settings.SEARCH_REQUEST_TIMEOUT,
+            )
             return response.get("count", 0)
         except Exception:
             return None
 
-    def search(
+    async def get_index_generation(self) -> Optional[str]:
+        """
+        Поколение индекса: имена и uuid конкретных индексов за INDEX_NAME.
+
+        Меняется при пересоздании индекса и при переключении алиаса.
+        """
+        response = await self.client.indices.get_settings(
+            index=self.index_name,
+            name="index.uuid",
+            request_timeout=settings.SEARCH_REQUEST_TIMEOUT,
+        )
+        return ",".join(
+            f"{index}:{body['settings']['index']['uuid']}"
+            for index, body in sorted(response.items())
+        )
+
+    async def search(
         self,
         query: str,
         size: int = 10,
         search_fields: Optional[list] = None,
         filters: Optional[Dict[str, Any]] = None,
+        source_fields: Optional[List[str]] = None,
+        lyrics_snippet: bool = False,
+        profile: str = "thorough",
+        timeout_ms: Optional[int] = None,
+        terminate_after: Optional[int] = None,
     ) -> Dict[str, Any]:
         """
         Выполняет поиск по индексу.
@@ -61,64 +114,159 @@ class OpenSearchService:
             size: Количество результатов
             search_fields: Поля для поиска
             filters: Фильтры для запроса
+            source_fields: Возвращаемые поля (см. source_fields())
+            lyrics_snippet: Добавить фрагмент текста с подсветкой совпадений
+            profile: Профиль запроса (fast, balanced, thorough)
+            timeout_ms: Бюджет времени, мс (по умолчанию — из профиля)
+            terminate_after: Бюджет документов на шард (по умолчанию — из профиля)
 
         Returns:
             Результаты поиска от OpenSearch
         """
+        search_body = self.build_search_body(
+            query,
+            size,
+            search_fields,
+            filters,
+            source_fields,
+            lyrics_snippet,
+            profile,
+            timeout_ms,
+            terminate_after,
+        )
+        response = await self.client.search(
+            index=self.index_name,
+            body=search_body,
+            request_timeout=settings.SEARCH_REQUEST_TIMEOUT,
+        )
+        return response
+
+    async def msearch(self, bodies: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Выполняет несколько поисков одним запросом _msearch.
+
+        Args:
+            bodies: Тела поисковых запросов (см. build_search_body)
+
+        Returns:
+            Ответ OpenSearch: responses в порядке запросов, у неудачных — error
+        """
+        lines = []
+        for body in bodies:
+            lines.append({"index": self.index_name})
+            lines.append(body)
+        return await self.client.msearch(
+            body=lines, request_timeout=settings.SEARCH_REQUEST_TIMEOUT
+        )
+
+    def build_search_body(
+        self,
+        query: str,
+        size: int = 10,
+        search_fields: Optional[list] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        source_fields: Optional[List[str]] = None,
+        lyrics_snippet: bool = False,
+        profile: str = "thorough",
+        timeout_ms: Optional[int] = None,
+        terminate_after: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """Строит тело запроса: query, size, _source, бюджеты и подсветка."""
         if search_fields is None:
             search_fields = ["artist_name", "track_name", "lyrics"]
 
-        search_body = self._build_search_query(query, search_fields, filters)
+        search_body = self._build_search_query(query, search_fields, filters, profile)
         search_body["size"] = size
-        search_body["_source"] = [
-            "track_id",
-            "artist_name",
-            "track_name",
-            "genre",
-            "release_date",
-            "topic",
-            "lyrics",
-            "danceability",
-            "energy",
-            "valence",
-            "acousticness",
-            "instrumentalness",
-            "loudness",
-        ]
-
-        response = self.client.search(index=self.index_name, body=search_body)
-        return response
+
+        # None — бюджет профиля, 0 — без бюджета
+        budgets = QUERY_PROFILES[profile]
+        if timeout_ms is None:
+            timeout_ms = budgets["timeout_ms"]
+        if terminate_after is None:
+            terminate_after = budgets["terminate_after"]
+        if timeout_ms:
+            search_body["timeout"] = f"{timeout_ms}ms"
+        if terminate_after:
+            search_body["terminate_after"] = terminate_after
+
+        search_body["_source"] = source_fields or self.source_fields()
+        if lyrics_snippet:
+            # фрагмент строится из текста в индексе, даже если lyrics нет в _source
+            search_body["highlight"] = {
+                "fields": {
+                    "lyrics": {
+                        "fragment_size": 150,
+                        "number_of_fragments": 1,
+                        "no_match_size": 150,
+                    }
+                }
+            }
+        return search_body
+
+    @staticmethod
+    def source_fields(
+        include_lyrics: bool = False, fields: Optional[List[str]] = None
+    ) -> List[str]:
+        """
+        Поля трека для _source.
+
+        Args:
+            include_lyrics: Возвращать полный текст песни (большой объём)
+            fields: Только эти поля (track_id, artist_name, track_name — всегда)
+
+        Returns:
+            Список полей
+        """
+        selected = [f for f in TRACK_FIELDS if fields is None or f in fields]
+        if not include_lyrics and (fields is None or "lyrics" not in fields):
+            selected = [f for f in selected if f != "lyrics"]
+        return REQUIRED_FIELDS + [f for f in selected if f not in REQUIRED_FIELDS]
 
     def _build_search_query(
         self,
         query: str,
         search_fields: list,
         filters: Optional[Dict[str, Any]] = None,
+        profile: str = "thorough",
     ) -> Dict[str, Any]:
-        """Строит поисковый запрос."""
-        text_query = {
-            "multi_match": {
-                "query": query,
-                "fields": [f"{field}^2" for field in search_fields]
-                + [f"{field}.ngram" for field in search_fields],
-                "type": "best_fields",
-                "fuzziness": "AUTO",
+        """Строит поисковый запрос для профиля (см. QUERY_PROFILES)."""
+        if profile == "fast":
+            text_query = {
+                "multi_match": {
+                    "query": query,
+                    "fields": [f"{field}^2" for field in search_fields],
+                    "type": "best_fields",
+                }
             }
-        }
+        else:
+            text_query = {
+                "multi_match": {
+                    "query": query,
+                    "fields": [f"{field}^2" for field in search_fields]
+                    + [f"{field}.ngram" for field in search_fields],
+                    "type": "best_fields",
+                    "fuzziness": "AUTO",
+                }
+            }
+            if profile == "balanced":
+                # меньше вариантов опечаток: первая буква совпадает
+                text_query["multi_match"]["prefix_length"] = 1
+                text_query["multi_match"]["max_expansions"] = 20
 
         field_queries = []
-        for field in search_fields:
-            boost = 3.0 if field == "lyrics" else 2.0
-            field_queries.append(
-                {
-                    "match": {
-                        field: {
-                            "query": query,
-                            "boost": boost,
+        if profile == "thorough":
+            for field in search_fields:
+                boost = 3.0 if field == "lyrics" else 2.0
+                field_queries.append(
+                    {
+                        "match": {
+                            field: {
+                                "query": query,
+                                "boost": boost,
+                            }
                         }
                     }
-                }
-            )
+                )
 
         should_clauses = [text_query] + field_queries
 
@@ -160,10 +308,52 @@ class OpenSearchService:
 
         return filter_clauses
 
-    def get_track_by_id(self, track_id: str) -> Optional[Dict[str, Any]]:
+    async def get_track_by_name(
+        self, artist: str, track: str
+    ) -> Optional[Dict[str, Any]]:
+        """Точный (без учёта регистра) поиск трека по исполнителю и названию."""
+        body = {
+            "size": 1,
+            "query": {
+                "bool": {
+                    "filter": [
+                        {
+                            "term": {
+                                "artist_name.keyword": {
+                                    "value": artist,
+                                    "case_insensitive": True,
+                                }
+                            }
+                        },
+                        {
+                            "term": {
+                                "track_name.keyword": {
+                                    "value": track,
+                                    "case_insensitive": True,
+                                }
+                            }
+                        },
+                    ]
+                }
+            },
+            "_source": ["track_id", "artist_name", "track_name", "lyrics"],
+        }
+        response = await self.client.search(
+            index=self.index_name,
+            body=body,
+            request_timeout=settings.SEARCH_REQUEST_TIMEOUT,
+        )
+        hits = response["hits"]["hits"]
+        return hits[0]["_source"] if hits else None
+
+    async def get_track_by_id(self, track_id: str) -> Optional[Dict[str, Any]]:
         """Получает трек по ID."""
         try:
-            response = self.client.get(index=self.index_name, id=track_id)
+            response = await self.client.get(
+                index=self.index_name,
+                id=track_id,
+                request_timeout=settings.SEARCH_REQUEST_TIMEOUT,
+            )
             return response.get("_source")
         except Exception:
             return None
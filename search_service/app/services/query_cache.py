@@ -0,0 +1,177 @@
+"""Кэш результатов поиска с TTL и сбросом при пересоздании индекса."""
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # redis нужен только для общего кэша нескольких workers
+    aioredis = None
+
+logger = logging.getLogger(__name__)
+
+
+def make_cache_key(query: str, **params: Any) -> str:
+    """
+    Ключ кэша: нормализованный запрос и все параметры, влияющие на выдачу.
+
+    Args:
+        query: Поисковый запрос (регистр и лишние пробелы не важны)
+        **params: size, поля, фильтры и т.д.
+
+    Returns:
+        Строковый ключ
+    """
+    normalized = " ".join(query.lower().split())
+    return json.dumps(
+        {"q": normalized, **params}, sort_keys=True, ensure_ascii=False, default=str
+    )
+
+
+class QueryCache:
+    """
+    LRU-кэш ответов поиска с TTL.
+
+    Каждая запись привязана к поколению индекса (uuid конкретного индекса за
+    именем или алиасом): после пересоздания индекса поколение меняется, и
+    старые записи больше не находятся. Поколение проверяется не чаще раза в
+    generation_check_interval секунд. С redis_url записи дополнительно
+    хранятся в Redis и общие для всех workers.
+    """
+
+    def __init__(
+        self,
+        generation_source: Callable[[], Awaitable[Optional[str]]],
+        ttl: float = 300,
+        max_entries: int = 10_000,
+        redis_url: str = "",
+        generation_check_interval: float = 30,
+    ):
+        """
+        Args:
+            generation_source: Корутина, возвращающая текущее поколение индекса
+            ttl: Время жизни записи, секунд
+            max_entries: Размер кэша в памяти
+            redis_url: Адрес Redis для общего кэша (пусто — только память)
+            generation_check_interval: Как часто сверять поколение индекса
+        """
+        self.generation_source = generation_source
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.generation_check_interval = generation_check_interval
+
+        # key -> (expires_at, value)
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.generation: Optional[str] = None
+        self._generation_checked_at = float("-inf")
+
+        self.redis = None
+        if redis_url:
+            if aioredis is None:
+                logger.warning("redis is not installed, search cache stays in memory")
+            else:
+                self.redis = aioredis.from_url(redis_url)
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.redis_errors = 0
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Возвращает сохранённый ответ или None."""
+        generation = await self._current_generation()
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            del self._entries[key]
+
+        if self.redis is not None:
+            try:
+                raw = await self.redis.get(self._redis_key(generation, key))
+            except Exception as e:
+                self.redis_errors += 1
+                logger.warning(f"Search cache redis get failed: {e}")
+                raw = None
+            if raw is not None:
+                value = json.loads(raw)
+                self._remember(key, value)
+                self.hits += 1
+                return value
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: Dict[str, Any]) -> None:
+        """Сохраняет ответ (JSON-совместимый словарь)."""
+        generation = await self._current_generation()
+        self._remember(key, value)
+
+        if self.redis is not None:
+            try:
+                await self.redis.set(
+                    self._redis_key(generation, key),
+                    json.dumps(value, ensure_ascii=False),
+                    ex=max(1, int(self.ttl)),
+                )
+            except Exception as e:
+                self.redis_errors += 1
+                logger.warning(f"Search cache redis set failed: {e}")
+
+    def _remember(self, key: str, value: Dict[str, Any]) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def _current_generation(self) -> Optional[str]:
+        now = time.monotonic()
+        if now - self._generation_checked_at < self.generation_check_interval:
+            return self.generation
+        self._generation_checked_at = now
+
+        try:
+            generation = await self.generation_source()
+        except Exception as e:
+            # OpenSearch недоступен — оставляем прежнее поколение
+            logger.warning(f"Cannot read index generation: {e}")
+            return self.generation
+
+        if generation != self.generation:
+            if self.generation is not None:
+                logger.info(
+                    f"Index generation changed {self.generation} -> {generation}, "
+                    "search cache cleared"
+                )
+                self.invalidations += 1
+            self._entries.clear()
+            self.generation = generation
+        return self.generation
+
+    def _redis_key(self, generation: Optional[str], key: str) -> str:
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return f"search:{generation}:{digest}"
+
+    def stats(self) -> Dict[str, Any]:
+        """Счётчики кэша для /health."""
+        total = self.hits + self.misses
+        return {
+            "backend": "memory+redis" if self.redis is not None else "memory",
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "index_generation": self.generation,
+            "invalidations": self.invalidations,
+            "redis_errors": self.redis_errors,
+        }
+
+    async def close(self) -> None:
+        """Закрывает соединение с Redis."""
+        if self.redis is not None:
+            await self.redis.close()
@@ -1,7 +1,16 @@
 """Сервис для поиска по музыкальному индексу."""
 from typing import List, Optional, Dict, Any
 from app.services.opensearch_service import opensearch_service
-from app.models.schemas import TrackResult, SearchResponse
+from app.services.query_cache import QueryCache, make_cache_key
+from app.models.schemas import (
+    BatchSearchItem,
+    BatchSearchResponse,
+    LyricsLookupResponse,
+    SearchRequest,
+    SearchResponse,
+    TrackResult,
+)
+from config import settings
 
 
 class SearchService:
@@ -10,13 +19,31 @@ class SearchService:
     def __init__(self):
         """Инициализация сервиса."""
         self.opensearch = opensearch_service
+        # частые запросы ("sad love songs") отдаются без похода в OpenSearch
+        self.cache = (
+            QueryCache(
+                self.opensearch.get_index_generation,
+                ttl=settings.SEARCH_CACHE_TTL,
+                max_entries=settings.SEARCH_CACHE_MAX_ENTRIES,
+                redis_url=settings.SEARCH_CACHE_REDIS_URL,
+                generation_check_interval=settings.SEARCH_CACHE_GENERATION_CHECK,
+            )
+            if settings.SEARCH_CACHE_TTL > 0
+            else None
+        )
 
-    def search(
+    async def search(
         self,
         query: str,
         size: int = 10,
         search_fields: Optional[List[str]] = None,
         filters: Optional[Dict[str, Any]] = None,
+        include_lyrics: bool = False,
+        fields: Optional[List[str]] = None,
+        lyrics_snippet: bool = False,
+        profile: Optional[str] = None,
+        timeout_ms: Optional[int] = None,
+        terminate_after: Optional[int] = None,
     ) -> SearchResponse:
         """
         Выполняет поиск по музыкальному индексу.
@@ -26,17 +53,160 @@ class SearchService:
             size: Количество результатов
             search_fields: Поля для поиска
             filters: Фильтры для запроса
+            include_lyrics: Возвращать полный текст песен
+            fields: Возвращать только эти поля трека
+            lyrics_snippet: Добавить фрагмент текста с подсветкой совпадений
+            profile: Профиль запроса (по умолчанию SEARCH_PROFILE)
+            timeout_ms: Бюджет времени, мс (по умолчанию — из профиля)
+            terminate_after: Бюджет документов на шард (по умолчанию — из профиля)
 
         Returns:
             Результаты поиска
         """
-        response = self.opensearch.search(
+        profile = profile or settings.SEARCH_PROFILE
+        source_fields = self.opensearch.source_fields(include_lyrics, fields)
+        key = make_cache_key(
+            query,
+            size=size,
+            search_fields=search_fields,
+            filters=filters,
+            source_fields=source_fields,
+            lyrics_snippet=lyrics_snippet,
+            profile=profile,
+            timeout_ms=timeout_ms,
+            terminate_after=terminate_after,
+        )
+        cached = await self._cached(key, query)
+        if cached is not None:
+            return cached
+
+        response = await self.opensearch.search(
             query=query,
             size=size,
             search_fields=search_fields,
             filters=filters,
+            source_fields=source_fields,
+            lyrics_snippet=lyrics_snippet,
+            profile=profile,
+            timeout_ms=timeout_ms,
+            terminate_after=terminate_after,
         )
+        result = self._to_search_response(response, query, source_fields, profile)
+        await self._store(key, result)
+        return result
+
+    async def search_batch(self, requests: List[SearchRequest]) -> BatchSearchResponse:
+        """
+        Выполняет несколько поисков одним запросом _msearch.
 
+        Args:
+            requests: Поисковые запросы
+
+        Returns:
+            Результаты в порядке запросов; ошибка одного запроса не
+            влияет на остальные
+        """
+        items: List[Optional[BatchSearchItem]] = []
+        keys = []
+        projections = []
+        profiles = []
+        for request in requests:
+            source_fields = self.opensearch.source_fields(
+                request.include_lyrics, request.fields
+            )
+            projections.append(source_fields)
+            profiles.append(request.profile or settings.SEARCH_PROFILE)
+            key = make_cache_key(
+                request.query,
+                size=request.size,
+                search_fields=request.search_fields,
+                filters=request.filters,
+                source_fields=source_fields,
+                lyrics_snippet=request.lyrics_snippet,
+                profile=profiles[-1],
+                timeout_ms=request.timeout_ms,
+                terminate_after=request.terminate_after,
+            )
+            cached = await self._cached(key, request.query)
+            items.append(
+                BatchSearchItem(response=cached, error=None)
+                if cached is not None
+                else None
+            )
+            keys.append(key)
+
+        # в OpenSearch уходят только запросы, которых нет в кэше
+        pending = [i for i, item in enumerate(items) if item is None]
+        if not pending:
+            return BatchSearchResponse(results=items, took=0)
+
+        bodies = [
+            self.opensearch.build_search_body(
+                query=requests[i].query,
+                size=requests[i].size,
+                search_fields=requests[i].search_fields,
+                filters=requests[i].filters,
+                source_fields=projections[i],
+                lyrics_snippet=requests[i].lyrics_snippet,
+                profile=profiles[i],
+                timeout_ms=requests[i].timeout_ms,
+                terminate_after=requests[i].terminate_after,
+            )
+            for i in pending
+        ]
+        response = await self.opensearch.msearch(bodies)
+
+        for i, item in zip(pending, response["responses"]):
+            if "error" in item:
+                error = item["error"]
+                if isinstance(error, dict):
+                    error = error.get("reason") or error.get("type")
+                items[i] = BatchSearchItem(response=None, error=str(error))
+                continue
+            try:
+                result = self._to_search_response(
+                    item, requests[i].query, projections[i], profiles[i]
+                )
+            except Exception as e:
+                items[i] = BatchSearchItem(response=None, error=str(e))
+                continue
+            items[i] = BatchSearchItem(response=result, error=None)
+            await self._store(keys[i], result)
+
+        return BatchSearchResponse(results=items, took=response.get("took"))
+
+    async def _cached(self, key: str, query: str) -> Optional[SearchResponse]:
+        """Ответ из кэша или None (кэш выключен, промах)."""
+        if self.cache is None:
+            return None
+        value = await self.cache.get(key)
+        if value is None:
+            return None
+        # ключ нормализован — исходный запрос возвращаем как есть
+        return SearchResponse(**{**value, "query": query})
+
+    async def _store(self, key: str, result: SearchResponse) -> None:
+        # оборванный по timeout ответ зависит от нагрузки — не кэшируем;
+        # частичный ответ terminate_after детерминирован, его можно
+        if result.timed_out:
+            return
+        if self.cache is not None:
+            # без exclude_unset не выбранные поля вернулись бы из кэша как null
+            await self.cache.set(key, result.model_dump(exclude_unset=True))
+
+    def _to_search_response(
+        self,
+        response: Dict[str, Any],
+        query: str,
+        source_fields: List[str],
+        profile: str,
+    ) -> SearchResponse:
+        """
+        Преобразует ответ OpenSearch в SearchResponse.
+
+        В TrackResult задаются только запрошенные поля: роутер отдаёт ответ с
+        exclude_unset, и остальные поля не попадают в JSON.
+        """
         total = response["hits"]["total"]["value"]
         took = response.get("took")
         hits = response["hits"]["hits"]
@@ -44,22 +214,13 @@ class SearchService:
         results = []
         for hit in hits:
             source = hit["_source"]
-            result = TrackResult(
-                track_id=source.get("track_id", ""),
-                artist_name=source.get("artist_name", ""),
-                track_name=source.get("track_name", ""),
-                genre=source.get("genre"),
-                release_date=source.get("release_date"),
-                topic=source.get("topic"),
-                lyrics=source.get("lyrics"),
-                score=hit.get("_score", 0.0),
-                danceability=source.get("danceability"),
-                energy=source.get("energy"),
-                valence=source.get("valence"),
-                acousticness=source.get("acousticness"),
-                instrumentalness=source.get("instrumentalness"),
-                loudness=source.get("loudness"),
-            )
+            values = {field: source.get(field) for field in source_fields}
+            for field in ("track_id", "artist_name", "track_name"):
+                values[field] = values[field] or ""
+            snippets = hit.get("highlight", {}).get("lyrics")
+            if snippets:
+                values["lyrics_snippet"] = snippets[0]
+            result = TrackResult(score=hit.get("_score") or 0.0, **values)
             results.append(result)
 
         return SearchResponse(
@@ -67,9 +228,36 @@ class SearchService:
             results=results,
             query=query,
             took=took,
+            profile=profile,
+            timed_out=response.get("timed_out", False),
+            terminated_early=response.get("terminated_early"),
+        )
+
+    async def find_lyrics(
+        self, artist: str, track: str
+    ) -> Optional[LyricsLookupResponse]:
+        """
+        Ищет текст песни по точному исполнителю и названию.
+
+        Args:
+            artist: Исполнитель
+            track: Название трека
+
+        Returns:
+            Текст песни или None, если трека нет или текст пустой
+        """
+        source = await self.opensearch.get_track_by_name(artist.strip(), track.strip())
+        if not source or not source.get("lyrics"):
+            return None
+
+        return LyricsLookupResponse(
+            track_id=source.get("track_id", ""),
+            artist_name=source.get("artist_name", ""),
+            track_name=source.get("track_name", ""),
+            lyrics=source["lyrics"],
         )
 
-    def get_track(self, track_id: str) -> Optional[TrackResult]:
+    async def get_track(self, track_id: str) -> Optional[TrackResult]:
         """
         Получает трек по ID.
 
@@ -79,7 +267,7 @@ class SearchService:
         Returns:
             Информация о треке или None
         """
-        source = self.opensearch.get_track_by_id(track_id)
+        source = await self.opensearch.get_track_by_id(track_id)
         if not source:
             return None
 
@@ -91,6 +279,8 @@ class SearchService:
             release_date=source.get("release_date"),
             topic=source.get("topic"),
             lyrics=source.get("lyrics"),
+            summary=source.get("summary"),
+            keywords=source.get("keywords"),
             score=0.0,
             danceability=source.get("danceability"),
             energy=source.get("energy"),
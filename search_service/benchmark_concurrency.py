@@ -0,0 +1,94 @@
+# benchmark_concurrency.py
+"""
+Throughput of POST /search as the number of parallel clients grows.
+
+    python benchmark_concurrency.py [requests_per_level] [--url http://localhost:8009]
+
+With the blocking OpenSearch client every request held the event loop, so
+requests/s stayed flat no matter how many clients were sending; with
+AsyncOpenSearch it should grow until the connection pool
+(OPENSEARCH_POOL_MAXSIZE) or OpenSearch itself saturates.
+"""
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+import aiohttp
+
+LEVELS = [1, 2, 4, 8, 16, 32]
+
+QUERIES = [
+    "sad love songs",
+    "summer party",
+    "lonely night",
+    "freedom road",
+    "broken heart",
+    "dance all night",
+    "rainy day",
+    "hometown memories",
+]
+
+
+async def run_level(
+    session: aiohttp.ClientSession, url: str, clients: int, total: int
+) -> tuple:
+    latencies = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def client() -> None:
+        nonlocal errors
+        for i in counter:
+            body = {"query": QUERIES[i % len(QUERIES)], "size": 10}
+            t0 = time.perf_counter()
+            try:
+                async with session.post(url, json=body) as r:
+                    await r.read()
+                    if r.status != 200:
+                        errors += 1
+                        continue
+            except aiohttp.ClientError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - t0)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    return time.perf_counter() - started, latencies, errors
+
+
+def report(clients: int, elapsed: float, latencies, errors: int) -> None:
+    if not latencies:
+        print(f"{clients:>7} | all {errors} requests failed")
+        return
+    latencies = sorted(latencies)
+    p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)]
+    print(
+        f"{clients:>7} | {len(latencies) / elapsed:8.1f} req/s | "
+        f"median {statistics.median(latencies) * 1000:7.1f} ms | "
+        f"p95 {p95 * 1000:7.1f} ms | errors {errors}"
+    )
+
+
+async def main(total: int, base_url: str) -> None:
+    url = base_url.rstrip("/") + "/search"
+    connector = aiohttp.TCPConnector(limit=max(LEVELS))
+    async with aiohttp.ClientSession(connector=connector) as session:
+        # прогрев: соединения и кэши OpenSearch
+        await run_level(session, url, 4, len(QUERIES))
+
+        print("clients | throughput  | latency")
+        for clients in LEVELS:
+            report(clients, *await run_level(session, url, clients, total))
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    base_url = os.getenv("SEARCH_SERVICE_URL", "http://localhost:8009")
+    if "--url" in args:
+        i = args.index("--url")
+        base_url = args[i + 1]
+        del args[i : i + 2]
+    asyncio.run(main(int(args[0]) if args else 200, base_url))
@@ -0,0 +1,81 @@
+# benchmark_payload.py
+"""
+Response size and latency of POST /search with and without full lyrics.
+
+    python benchmark_payload.py [requests] [--size 100] [--url http://localhost:8009]
+
+Modes: full lyrics in every hit (include_lyrics, the old default), the new
+default without lyrics, a highlighted lyric snippet instead of the text, and
+a minimal projection (fields=[genre, release_date]).
+"""
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+import aiohttp
+
+QUERIES = [
+    "sad love songs",
+    "summer party",
+    "lonely night",
+    "freedom road",
+    "broken heart",
+]
+
+MODES = {
+    "lyrics": {"include_lyrics": True},
+    "default": {},
+    "snippet": {"lyrics_snippet": True},
+    "fields": {"fields": ["genre", "release_date"]},
+}
+
+
+async def run_mode(
+    session: aiohttp.ClientSession, url: str, params: dict, size: int, total: int
+) -> tuple:
+    latencies = []
+    sizes = []
+    for i in range(total):
+        body = {"query": QUERIES[i % len(QUERIES)], "size": size, **params}
+        t0 = time.perf_counter()
+        async with session.post(url, json=body) as r:
+            payload = await r.read()
+            r.raise_for_status()
+        latencies.append(time.perf_counter() - t0)
+        sizes.append(len(payload))
+    return latencies, sizes
+
+
+async def main(total: int, size: int, base_url: str) -> None:
+    url = base_url.rstrip("/") + "/search"
+    async with aiohttp.ClientSession() as session:
+        # прогрев: соединения и кэш поиска (SEARCH_CACHE_TTL=0 — мерить OpenSearch)
+        for params in MODES.values():
+            await run_mode(session, url, params, size, len(QUERIES))
+
+        print(f"size={size}")
+        for name, params in MODES.items():
+            latencies, sizes = await run_mode(session, url, params, size, total)
+            print(
+                f"{name:>8} | {statistics.mean(sizes) / 1024:8.1f} KiB | "
+                f"median {statistics.median(latencies) * 1000:7.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    options = {"--size": "100", "--url": os.getenv("SEARCH_SERVICE_URL", "")}
+    for option in options:
+        if option in args:
+            i = args.index(option)
+            options[option] = args[i + 1]
+            del args[i : i + 2]
+    asyncio.run(
+        main(
+            int(args[0]) if args else 50,
+            int(options["--size"]),
+            options["--url"] or "http://localhost:8009",
+        )
+    )
@@ -0,0 +1,114 @@
+# benchmark_profiles.py
+"""
+Latency and recall of the query profiles (fast / balanced / thorough) on CEDS.
+
+    python benchmark_profiles.py [queries] [--csv ./data/tcc_ceds_music.csv]
+
+Tracks are sampled from the CEDS CSV (the same file create_index.py indexed)
+and turned into three query sets:
+  title  - "artist track", an exact known-item lookup
+  typo   - the same with one letter dropped from the track name
+  lyrics - six consecutive words from the lyrics
+For each profile: median/p95 latency, recall@10 of the sampled track, overlap
+of the top 10 with thorough (the old query), and the share of partial
+(timed out / terminated early) responses. Queries go straight to OpenSearch,
+bypassing the service cache.
+"""
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.getcwd())
+
+from app.services.opensearch_service import QUERY_PROFILES, opensearch_service
+from config import settings
+
+SOURCE_FIELDS = ["track_id", "artist_name", "track_name"]
+
+
+def build_queries(csv_path: str, count: int, seed: int = 42) -> dict:
+    df = pd.read_csv(csv_path)
+    df = df.sample(n=min(count, len(df)), random_state=seed)
+    rng = random.Random(seed)
+
+    queries = {"title": [], "typo": [], "lyrics": []}
+    for idx, row in df.iterrows():
+        # track_id — как в create_index.load_music_data
+        track_id = str(row.get("Unnamed: 0", idx))
+        artist, track = str(row["artist_name"]), str(row["track_name"])
+        queries["title"].append((f"{artist} {track}", track_id))
+
+        if len(track) > 3:
+            i = rng.randrange(1, len(track) - 1)
+            queries["typo"].append((f"{artist} {track[:i]}{track[i + 1:]}", track_id))
+
+        words = str(row.get("lyrics", "")).split()
+        if len(words) >= 6:
+            start = rng.randrange(0, len(words) - 5)
+            queries["lyrics"].append((" ".join(words[start : start + 6]), track_id))
+    return queries
+
+
+async def run(profile: str, queries: list) -> dict:
+    latencies, tops, found, partial = [], [], 0, 0
+    for query, track_id in queries:
+        t0 = time.perf_counter()
+        response = await opensearch_service.search(
+            query, size=10, source_fields=SOURCE_FIELDS, profile=profile
+        )
+        latencies.append(time.perf_counter() - t0)
+
+        ids = [hit["_source"].get("track_id") for hit in response["hits"]["hits"]]
+        tops.append(ids)
+        found += track_id in ids
+        partial += bool(response.get("timed_out") or response.get("terminated_early"))
+    return {
+        "latencies": sorted(latencies),
+        "tops": tops,
+        "recall": found / len(queries),
+        "partial": partial / len(queries),
+    }
+
+
+def overlap(tops, reference) -> float:
+    shares = [len(set(a) & set(b)) / len(b) for a, b in zip(tops, reference) if b]
+    return statistics.mean(shares) if shares else 0.0
+
+
+async def main(count: int, csv_path: str) -> None:
+    query_sets = build_queries(csv_path, count)
+    try:
+        # прогрев: соединения и кэши OpenSearch
+        for profile in QUERY_PROFILES:
+            await run(profile, query_sets["title"][:10])
+
+        print("set    | profile  | median ms | p95 ms | recall@10 | overlap | partial")
+        for name, queries in query_sets.items():
+            results = {p: await run(p, queries) for p in QUERY_PROFILES}
+            reference = results["thorough"]["tops"]
+            for profile, r in results.items():
+                latencies = r["latencies"]
+                p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)]
+                print(
+                    f"{name:<6} | {profile:<8} | "
+                    f"{statistics.median(latencies) * 1000:9.1f} | "
+                    f"{p95 * 1000:6.1f} | {r['recall']:9.2f} | "
+                    f"{overlap(r['tops'], reference):7.2f} | {r['partial']:7.0%}"
+                )
+    finally:
+        await opensearch_service.close()
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    csv_path = settings.CSV_FILE
+    if "--csv" in args:
+        i = args.index("--csv")
+        csv_path = args[i + 1]
+        del args[i : i + 2]
+    asyncio.run(main(int(args[0]) if args else 200, csv_path))
@@ -25,6 +25,25 @@ class Settings:
         "https://llm.api.cloud.yandex.net/foundationModels/v1/textEmbedding",
     )
     INDEX_NAME: str = os.getenv("OPENSEARCH_INDEX", "music_ceds_semantic")
+    # пул соединений AsyncOpenSearch и таймауты: общий (подключение, служебные
+    # запросы) и на каждый поисковый запрос
+    OPENSEARCH_POOL_MAXSIZE: int = int(os.getenv("OPENSEARCH_POOL_MAXSIZE", 20))
+    OPENSEARCH_TIMEOUT: float = float(os.getenv("OPENSEARCH_TIMEOUT", 10))
+    OPENSEARCH_MAX_RETRIES: int = int(os.getenv("OPENSEARCH_MAX_RETRIES", 3))
+    SEARCH_REQUEST_TIMEOUT: float = float(os.getenv("SEARCH_REQUEST_TIMEOUT", 5))
+    # сколько запросов можно передать в POST /search/batch
+    SEARCH_BATCH_MAX_SIZE: int = int(os.getenv("SEARCH_BATCH_MAX_SIZE", 20))
+    # профиль запроса по умолчанию: fast, balanced или thorough (самый полный)
+    SEARCH_PROFILE: str = os.getenv("SEARCH_PROFILE", "thorough")
+    # кэш ответов поиска: TTL в секундах (0 — выключен), размер в памяти, общий
+    # Redis для нескольких workers (пусто — только память) и как часто сверять
+    # поколение индекса (после пересоздания индекса кэш сбрасывается)
+    SEARCH_CACHE_TTL: float = float(os.getenv("SEARCH_CACHE_TTL", 300))
+    SEARCH_CACHE_MAX_ENTRIES: int = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", 10_000))
+    SEARCH_CACHE_REDIS_URL: str = os.getenv("SEARCH_CACHE_REDIS_URL", "")
+    SEARCH_CACHE_GENERATION_CHECK: float = float(
+        os.getenv("SEARCH_CACHE_GENERATION_CHECK", 30)
+    )
     CSV_FILE: str = os.getenv("CSV_FILE", "./data/tcc_ceds_music.csv")
     APP_NAME: str = "Music Search API"
     APP_VERSION: str = "1.0.0"
@@ -51,6 +70,9 @@ class Settings:
                 "YANDEX_FOLDER_ID не установлен. Установите через переменную окружения или .env файл"
             )
 
+        if self.SEARCH_PROFILE not in ("fast", "balanced", "thorough"):
+            errors.append("SEARCH_PROFILE должен быть fast, balanced или thorough")
+
         if errors:
             error_msg = "\n".join(f"  - {error}" for error in errors)
             raise ValueError(
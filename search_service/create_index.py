@@ -253,6 +253,9 @@ INDEX_BODY: Dict[str, Any] = {
             "sadness": {"type": "float"},
             "feelings": {"type": "float"},
             "track_id": {"type": "keyword"},
+            # заполняются lyrics_service/enrich_catalog.py
+            "summary": {"type": "text", "analyzer": "text_analyzer"},
+            "keywords": {"type": "keyword"},
         }
     },
 }
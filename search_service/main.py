@@ -1,6 +1,7 @@
 """Главный файл FastAPI приложения."""
 
 import os
+from contextlib import asynccontextmanager
 
 from dotenv import load_dotenv
 from fastapi import FastAPI
@@ -8,6 +9,8 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from config import settings
 from app.routers import search, health
+from app.services.opensearch_service import opensearch_service
+from app.services.search_service import search_service
 
 dotenv_path = os.path.join(os.getcwd(), ".env")
 print(dotenv_path)
@@ -23,7 +26,18 @@ except ValueError as e:
     print(f"ОШИБКА КОНФИГУРАЦИИ: {e}", file=sys.stderr)
     sys.exit(1)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Закрывает пул соединений OpenSearch и Redis при остановке приложения."""
+    yield
+    await opensearch_service.close()
+    if search_service.cache:
+        await search_service.cache.close()
+
+
 app = FastAPI(
+    lifespan=lifespan,
     title=settings.APP_NAME,
     version=settings.APP_VERSION,
     description="API для поиска по музыкальному индексу CEDS",
@@ -20,12 +20,19 @@ class Settings(BaseSettings):
     RABBIT_PORT: int = int(os.getenv("RABBIT_PORT", 5432))
     RABBIT_USER: str = os.getenv("RABBIT_USER", "guest")
     RABBIT_PASS: str = os.getenv("RABBIT_PASS", "guest")
+    # сколько сообщений воркер обрабатывает одновременно и сколько берёт у брокера
+    RABBIT_MAX_CONCURRENCY: int = int(os.getenv("RABBIT_MAX_CONCURRENCY", 8))
+    RABBIT_PREFETCH_COUNT: int = int(os.getenv("RABBIT_PREFETCH_COUNT", 0))
 
     QUEUE_REQUESTS: str = os.getenv("QUEUE_REQUESTS", "requests")
     QUEUE_LYRICS: str = os.getenv("QUEUE_LYRICS", "lyrics")
     QUEUE_RESPONSE: str = os.getenv("QUEUE_RESPONSE", "response")
 
     MISTRAL_API_KEY: Optional[str] = os.getenv("MISTRAL_API_KEY", None)
+    # предохранитель Mistral: столько ошибок подряд -> открыт, через столько секунд —
+    # пробный запрос
+    BREAKER_FAILURE_THRESHOLD: int = int(os.getenv("BREAKER_FAILURE_THRESHOLD", 5))
+    BREAKER_RECOVERY_TIMEOUT: float = float(os.getenv("BREAKER_RECOVERY_TIMEOUT", 30))
 
     @property
     def DATABASE_URL(self):
@@ -1,6 +1,6 @@
 import asyncio
 import logging
-from typing import Callable, Awaitable, Optional
+from typing import Callable, Awaitable, Optional, Set
 
 import aio_pika
 from aio_pika import exceptions as ap_exc
@@ -18,11 +18,19 @@ class RobustRabbitMQClient:
         host: str = "localhost",
         port: int = 5672,
         heartbeat: int = 600,
+        prefetch_count: Optional[int] = None,
+        max_concurrency: int = 1,
     ):
         self.host = host
         self.port = port
         self.heartbeat = heartbeat
 
+        # сколько сообщений обрабатывается одновременно; prefetch по умолчанию
+        # равен этому числу, чтобы брокер не держал лишнего в одном консьюмере
+        self.max_concurrency = max(1, max_concurrency)
+        self.prefetch_count = prefetch_count or self.max_concurrency
+        self._tasks: Set[asyncio.Task] = set()
+
         self.connection: Optional[aio_pika.RobustConnection] = None
         self.channel: Optional[aio_pika.Channel] = None
         self.is_connected: bool = False
@@ -46,7 +54,7 @@ class RobustRabbitMQClient:
                 )  # type: ignore
 
                 self.channel = await self.connection.channel()  # type: ignore
-                await self.channel.set_qos(prefetch_count=1)  # type: ignore
+                await self.channel.set_qos(prefetch_count=self.prefetch_count)  # type: ignore
 
                 self.is_connected = True
                 logging.info("Successfully connected to RabbitMQ")
@@ -130,13 +138,17 @@ class RobustRabbitMQClient:
 
                 logging.info(f"Started consuming from queue: {queue_name}")
 
+                semaphore = asyncio.Semaphore(self.max_concurrency)
+
                 async with queue.iterator() as queue_iter:
                     async for message in queue_iter:
-                        try:
-                            await callback(message)
-                        except Exception as e:
-                            logging.error(f"Callback error: {e}")
-                            await message.nack(requeue=True)
+                        # не берём новое сообщение, пока заняты все слоты
+                        await semaphore.acquire()
+                        task = asyncio.create_task(
+                            self._handle_message(message, callback, semaphore)
+                        )
+                        self._tasks.add(task)
+                        task.add_done_callback(self._tasks.discard)
 
             except (
                 ap_exc.ConnectionClosed,
@@ -151,6 +163,8 @@ class RobustRabbitMQClient:
 
             except asyncio.CancelledError:
                 logging.info("Consumer task cancelled gracefully")
+                for task in list(self._tasks):
+                    task.cancel()
                 return
 
             except Exception as e:
@@ -158,6 +172,24 @@ class RobustRabbitMQClient:
                 self.is_connected = False
                 await asyncio.sleep(10)
 
+    async def _handle_message(
+        self,
+        message: aio_pika.IncomingMessage,
+        callback: Callable[[aio_pika.IncomingMessage], Awaitable[None]],
+        semaphore: asyncio.Semaphore,
+    ):
+        try:
+            await callback(message)
+        except Exception as e:
+            logging.error(f"Callback error: {e}")
+            if not message.processed:
+                try:
+                    await message.nack(requeue=True)
+                except Exception as nack_error:
+                    logging.error(f"Failed to nack message: {nack_error}")
+        finally:
+            semaphore.release()
+
     async def close(self):
         try:
             if self.connection and not self.connection.is_closed:
@@ -168,5 +200,8 @@ class RobustRabbitMQClient:
 
 
 rabbitmq_client = RobustRabbitMQClient(
-    get_settings().RABBIT_HOST, get_settings().RABBIT_PORT
+    get_settings().RABBIT_HOST,
+    get_settings().RABBIT_PORT,
+    prefetch_count=get_settings().RABBIT_PREFETCH_COUNT or None,
+    max_concurrency=get_settings().RABBIT_MAX_CONCURRENCY,
 )
@@ -2,6 +2,8 @@ import asyncio
 import json
 import logging
 import re
+from collections import OrderedDict
+from typing import Optional
 
 import aio_pika
 
@@ -18,18 +20,37 @@ logging.basicConfig(
 )
 
 
+PLACEHOLDER_TEXT = "⏳ Подбираю рекомендации..."
+
+
+class _LiveMessage:
+    """Сообщение, которое правится по мере прихода кусков ответа."""
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.chat_id: Optional[int] = None
+        self.message_id: Optional[int] = None
+        self.seq = 0
+        self.finished = False
+
+
 class MessageSender:
-    def __init__(self, bot, rabbitmq_client):
+    def __init__(self, bot, rabbitmq_client, max_live_messages=1000):
         self.bot = bot
         self.rabbitmq_client = rabbitmq_client
 
         self.response_queue = settings.QUEUE_RESPONSE
 
+        # request_id -> показанное сообщение; завершённые тоже помним,
+        # чтобы опоздавший кусок не прислал новое сообщение
+        self._live: "OrderedDict[int, _LiveMessage]" = OrderedDict()
+        self.max_live_messages = max_live_messages
+
         self._process_task = None
 
     def start(self):
         if not self._process_task:
-            asyncio.create_task(self.loop())
+            self._process_task = asyncio.create_task(self.loop())
 
     async def loop(self):
         logging.info("Starting loop...")
@@ -48,8 +69,18 @@ class MessageSender:
             if not request_id or response_text is None:
                 raise KeyError("request_id or response")
 
+            live = self._live_message(request_id)
+            if data.get("partial"):
+                async with live.lock:
+                    await self._show_partial(
+                        live, request_id, data.get("seq", 0), response_text
+                    )
+                # промежуточные куски не повторяем: следующий всё равно придёт
+                await message.ack()
+                return
+
             # Получаем сессию и данные из БД
-            async with AsyncSessionLocal() as session:
+            async with live.lock, AsyncSessionLocal() as session:
                 # Получаем запрос
                 request = await session.get(Request, request_id)
                 if not request:
@@ -66,12 +97,8 @@ class MessageSender:
 
                 telegram_chat_id = int(user.telegram_id)
 
-                # Отправляем сообщение
-                await self.bot.send_message(
-                    chat_id=telegram_chat_id,
-                    text=self.escape_markdown_v2(response_text),
-                    parse_mode="MarkdownV2",
-                )
+                # Отправляем сообщение (или дописываем показанное по кускам)
+                await self._deliver(live, telegram_chat_id, response_text)
 
                 # Сохраняем ответ в БД
                 new_response = Response(
@@ -81,6 +108,7 @@ class MessageSender:
                 )
                 session.add(new_response)
                 await session.commit()
+                live.finished = True
 
             # Подтверждаем обработку
             await message.ack()
@@ -100,6 +128,76 @@ class MessageSender:
             logging.error(f"Unexpected error: {e}", exc_info=True)
             await message.nack(requeue=True)
 
+    def _live_message(self, request_id) -> _LiveMessage:
+        live = self._live.get(request_id)
+        if live is None:
+            live = self._live[request_id] = _LiveMessage()
+            while len(self._live) > self.max_live_messages:
+                self._live.popitem(last=False)
+        self._live.move_to_end(request_id)
+        return live
+
+    async def _show_partial(
+        self, live: _LiveMessage, request_id, seq: int, text: str
+    ) -> None:
+        # куски обрабатываются параллельно и могут прийти не по порядку
+        if live.finished or seq <= live.seq:
+            return
+        live.seq = seq
+
+        try:
+            if live.message_id is None:
+                if live.chat_id is None:
+                    live.chat_id = await self._telegram_chat_id(request_id)
+                    if live.chat_id is None:
+                        return
+                sent = await self.bot.send_message(
+                    chat_id=live.chat_id,
+                    text=self.escape_markdown_v2(text or PLACEHOLDER_TEXT),
+                    parse_mode="MarkdownV2",
+                )
+                live.message_id = sent.message_id
+            elif text:
+                await self.bot.edit_message_text(
+                    text=self.escape_markdown_v2(text),
+                    chat_id=live.chat_id,
+                    message_id=live.message_id,
+                    parse_mode="MarkdownV2",
+                )
+        except Exception as e:
+            if not _not_modified(e):
+                logging.warning(f"Partial response {request_id} #{seq} not shown: {e}")
+
+    async def _deliver(self, live: _LiveMessage, chat_id: int, text: str) -> None:
+        escaped = self.escape_markdown_v2(text)
+        if live.message_id is not None and live.chat_id == chat_id:
+            try:
+                await self.bot.edit_message_text(
+                    text=escaped,
+                    chat_id=chat_id,
+                    message_id=live.message_id,
+                    parse_mode="MarkdownV2",
+                )
+                return
+            except Exception as e:
+                if _not_modified(e):
+                    return
+                logging.warning(f"Cannot edit streamed message, sending anew: {e}")
+
+        await self.bot.send_message(
+            chat_id=chat_id, text=escaped, parse_mode="MarkdownV2"
+        )
+
+    async def _telegram_chat_id(self, request_id) -> Optional[int]:
+        async with AsyncSessionLocal() as session:
+            request = await session.get(Request, request_id)
+            if not request:
+                return None
+            user = await session.get(User, request.user_id)
+            if not user or not user.telegram_id:
+                return None
+            return int(user.telegram_id)
+
     def escape_markdown_v2(self, text):
         """Escape special characters for MarkdownV2"""
         escape_chars = r"_[]()~`>#+-=|{}.!"
@@ -108,3 +206,8 @@ class MessageSender:
     def stop(self):
         if self._process_task:
             self._process_task.cancel()
+
+
+def _not_modified(error: Exception) -> bool:
+    # Telegram отвечает ошибкой, если текст правки совпадает с текущим
+    return "message is not modified" in str(error)
@@ -1,5 +1,6 @@
 from mistralai import Mistral
 from .prompt_templates import RELEVANCE_PROMPT, NORMALIZE_TRACKS_PROMPT
+from .circuit_breaker import CircuitBreaker
 from database.config import get_settings
 from typing import List
 import asyncio
@@ -12,10 +13,18 @@ import logging
 # Инициализация клиента
 _SETTINGS = get_settings()
 _mistral_client = Mistral(api_key=_SETTINGS.MISTRAL_API_KEY)
+# Mistral лежит — не ждём таймаута SDK на каждом сообщении пользователя
+_mistral_breaker = CircuitBreaker(
+    "mistral",
+    failure_threshold=_SETTINGS.BREAKER_FAILURE_THRESHOLD,
+    recovery_timeout=_SETTINGS.BREAKER_RECOVERY_TIMEOUT,
+)
 
 
 async def call_llm(prompt: str, model: str = "mistral-small") -> str:
     """Вызов LLM с обработкой ошибок."""
+    if not _mistral_breaker.allow():
+        return ""
     try:
         loop = asyncio.get_event_loop()
         response = await loop.run_in_executor(
@@ -28,10 +37,12 @@ async def call_llm(prompt: str, model: str = "mistral-small") -> str:
                 max_tokens=200,
             ),
         )
-        return response.choices[0].message.content or ""
     except Exception as e:
+        _mistral_breaker.record_failure()
         logging.error(f"Ошибка при вызове Mistral API: {e}")
         return ""
+    _mistral_breaker.record_success()
+    return response.choices[0].message.content or ""
 
 
 class LLMService: